@@ -3,6 +3,9 @@
 Example MCP server for testing the interactive client.
 """
 
+import json
+from typing import Literal
+
 from mcp.server.fastmcp import FastMCP
 
 # Create an MCP server
@@ -16,16 +19,23 @@ def review_code(code: str, language: str = "python") -> str:
     return f"Please review this {language} code:\n\n{code}\n\nProvide feedback on style, logic, and potential improvements."
 
 
+# Static config, serialized once at import since it never changes
+CONFIG_JSON = json.dumps(
+    {
+        "app_name": "Example App",
+        "version": "1.0.0",
+        "features": ["feature1", "feature2"],
+        "debug": False,
+    },
+    separators=(",", ":"),
+)
+
+
 # Add a static config resource
 @mcp.resource("config://app")
 def get_config() -> str:
     """Static configuration data"""
-    return """{
-        "app_name": "Example App",
-        "version": "1.0.0",
-        "features": ["feature1", "feature2"],
-        "debug": false
-    }"""
+    return CONFIG_JSON
 
 
 # Add a dynamic greeting resource
@@ -42,34 +52,80 @@ def add(a: int, b: int) -> int:
     return a + b
 
 
+# Text operations supported by process_text
+TEXT_OPERATIONS = {
+    "uppercase": str.upper,
+    "lowercase": str.lower,
+    "title": str.title,
+    "reverse": lambda text: text[::-1],
+}
+
+
 # Add a text processing tool
 @mcp.tool()
 def process_text(text: str, operation: str = "uppercase") -> str:
     """Process text with various operations."""
-    if operation == "uppercase":
-        return text.upper()
-    elif operation == "lowercase":
-        return text.lower()
-    elif operation == "title":
-        return text.title()
-    elif operation == "reverse":
-        return text[::-1]
+    op = TEXT_OPERATIONS.get(operation)
+    return op(text) if op else f"Unknown operation: {operation}"
+
+
+# Lists shorter than this are cheaper to filter in pure Python
+NUMPY_MIN_ITEMS = 1000
+
+
+# Numbers accepted by filter_list; the union keeps ints from being coerced
+Number = int | float
+
+
+def _filter_numeric_array(items: list[Number], condition: str) -> list | None:
+    """Filter an all-integer list with NumPy, or return None to fall back."""
+    if len(items) < NUMPY_MIN_ITEMS:
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    try:
+        arr = np.asarray(items)
+    except (TypeError, ValueError):
+        # Ragged or otherwise non-array-like input
+        return None
+    # Only integer arrays: mixed int/float lists would come back as floats
+    if arr.ndim != 1 or arr.dtype.kind not in "iu":
+        return None
+
+    if condition == "even":
+        mask = arr % 2 == 0
+    elif condition == "odd":
+        mask = arr % 2 == 1
+    elif condition == "positive":
+        mask = arr > 0
     else:
-        return f"Unknown operation: {operation}"
+        return None
+    return arr[mask].tolist()
 
 
 # Add a list processing tool
 @mcp.tool()
-def filter_list(items: list, condition: str = "all") -> list:
+def filter_list(
+    items: list[Number],
+    condition: Literal["all", "even", "odd", "positive"] = "all",
+) -> list[Number]:
     """Filter a list based on conditions."""
     if condition == "all":
         return items
-    elif condition == "even":
-        return [x for x in items if isinstance(x, (int, float)) and x % 2 == 0]
+    if condition in ("even", "odd", "positive"):
+        filtered = _filter_numeric_array(items, condition)
+        if filtered is not None:
+            return filtered
+
+    if condition == "even":
+        return [x for x in items if x % 2 == 0]
     elif condition == "odd":
-        return [x for x in items if isinstance(x, (int, float)) and x % 2 == 1]
+        return [x for x in items if x % 2 == 1]
     elif condition == "positive":
-        return [x for x in items if isinstance(x, (int, float)) and x > 0]
+        return [x for x in items if x > 0]
     else:
         return items
 
@@ -0,0 +1,191 @@
+"""Tab completion for the interactive REPL.
+
+Kept out of ``mcpie_cli.mcpie`` so prompt_toolkit is only imported when the
+REPL actually starts.
+"""
+
+from typing import TYPE_CHECKING
+
+from prompt_toolkit.completion import Completer, Completion
+
+if TYPE_CHECKING:
+    from .mcpie import MCPSession
+
+
+class MCPCompleter(Completer):
+    """Custom completer for MCP commands with auto-completion for tools, prompts, and resources."""
+
+    def __init__(self, session: "MCPSession", commands: dict):
+        self.session = session
+        self.commands = commands
+        self.base_commands = {
+            "help": "Show help information",
+            "quit": "Exit the REPL",
+            "exit": "Exit the REPL",
+            "clear": "Clear the screen",
+            "ls": "List resources (alias for resources/list)",
+            "discover": "Show all available resources, tools, and prompts",
+        }
+        # Cache for auto-completion data
+        self._tools_cache = None
+        self._prompts_cache = None
+        self._resources_cache = None
+        self._cache_populated = False
+
+    def _populate_cache_sync(self):
+        """Populate cache synchronously if possible."""
+        if self._cache_populated or not self.session.initialized:
+            return
+
+        try:
+            # Try to get cached data if session has it
+            if hasattr(self.session, "_completion_cache"):
+                cache = self.session._completion_cache
+                self._tools_cache = cache.get("tools", [])
+                self._prompts_cache = cache.get("prompts", [])
+                self._resources_cache = cache.get("resources", [])
+                self._cache_populated = True
+        except:  # noqa: E722
+            pass
+
+    async def _get_tools(self) -> list[str]:
+        """Get list of available tool names."""
+        if self._tools_cache is None and self.session.initialized:
+            try:
+                result = await self.session.execute_command("tools", "list")
+                if result and hasattr(result, "tools"):
+                    self._tools_cache = [tool.name for tool in result.tools]
+                    # Store in session for sync access
+                    if not hasattr(self.session, "_completion_cache"):
+                        self.session._completion_cache = {}
+                    self.session._completion_cache["tools"] = self._tools_cache
+                else:
+                    self._tools_cache = []
+            except:  # noqa: E722
+                self._tools_cache = []
+        return self._tools_cache or []
+
+    async def _get_prompts(self) -> list[str]:
+        """Get list of available prompt names."""
+        if self._prompts_cache is None and self.session.initialized:
+            try:
+                result = await self.session.execute_command("prompts", "list")
+                if result and hasattr(result, "prompts"):
+                    self._prompts_cache = [prompt.name for prompt in result.prompts]
+                    # Store in session for sync access
+                    if not hasattr(self.session, "_completion_cache"):
+                        self.session._completion_cache = {}
+                    self.session._completion_cache["prompts"] = self._prompts_cache
+                else:
+                    self._prompts_cache = []
+            except:  # noqa: E722
+                self._prompts_cache = []
+        return self._prompts_cache or []
+
+    async def _get_resources(self) -> list[str]:
+        """Get list of available resource URIs."""
+        if self._resources_cache is None and self.session.initialized:
+            try:
+                result = await self.session.execute_command("resources", "list")
+                if result and hasattr(result, "resources"):
+                    self._resources_cache = [
+                        str(resource.uri) for resource in result.resources
+                    ]
+                    # Store in session for sync access
+                    if not hasattr(self.session, "_completion_cache"):
+                        self.session._completion_cache = {}
+                    self.session._completion_cache["resources"] = self._resources_cache
+                else:
+                    self._resources_cache = []
+            except:  # noqa: E722
+                self._resources_cache = []
+        return self._resources_cache or []
+
+    def get_completions(self, document, complete_event):
+        word = document.get_word_before_cursor()
+        line = document.text_before_cursor
+        parts = line.split()
+
+        # Populate cache from session if available
+        self._populate_cache_sync()
+
+        # Auto-complete tool names for "t call <tool_name>" and "t inspect <tool_name>"
+        if (
+            len(parts) >= 2
+            and parts[0] in ["t", "tools"]
+            and parts[1] in ["call", "inspect"]
+            and len(parts) == 3
+        ):
+            tools = self._tools_cache or []
+            for tool in tools:
+                if tool.startswith(word):
+                    yield Completion(
+                        tool,
+                        start_position=-len(word),
+                        display=f"{tool} (tool)",
+                    )
+            return
+
+        # Auto-complete prompt names for "p get <prompt_name>" and "p inspect <prompt_name>"
+        if (
+            len(parts) >= 2
+            and parts[0] in ["p", "prompts"]
+            and parts[1] in ["get", "inspect"]
+            and len(parts) == 3
+        ):
+            prompts = self._prompts_cache or []
+            for prompt in prompts:
+                if prompt.startswith(word):
+                    yield Completion(
+                        prompt,
+                        start_position=-len(word),
+                        display=f"{prompt} (prompt)",
+                    )
+            return
+
+        # Auto-complete resource URIs for "r read <uri>" and "r inspect <uri>"
+        if (
+            len(parts) >= 2
+            and parts[0] in ["r", "resources"]
+            and parts[1] in ["read", "inspect"]
+            and len(parts) == 3
+        ):
+            resources = self._resources_cache or []
+            for resource in resources:
+                if resource.startswith(word):
+                    yield Completion(
+                        resource,
+                        start_position=-len(word),
+                        display=f"{resource} (resource)",
+                    )
+            return
+
+        # Handle subcommands - only show when we have exactly 2 parts (command + partial subcommand)
+        for cmd_name, cmd_config in self.commands.items():
+            for alias in [cmd_name] + cmd_config.aliases:
+                if line.startswith(f"{alias} ") and len(parts) == 2:
+                    subcommands = []
+                    for sub_name, sub_config in cmd_config.subcommands.items():
+                        subcommands.append(sub_name)
+                        subcommands.extend(sub_config.get("aliases", []))
+
+                    for subcmd in subcommands:
+                        if subcmd.startswith(word):
+                            yield Completion(
+                                subcmd, start_position=-len(word), display=subcmd
+                            )
+                    return
+
+        # Main commands - only show when we don't have any parts yet or just one partial word
+        if len(parts) <= 1:
+            all_commands = {**self.base_commands}
+            for cmd_name, cmd_config in self.commands.items():
+                all_commands[cmd_name] = f"{cmd_name.title()} commands"
+                for alias in cmd_config.aliases:
+                    all_commands[alias] = f"{cmd_name.title()} commands"
+
+            for cmd, desc in all_commands.items():
+                if cmd.startswith(word):
+                    yield Completion(
+                        cmd, start_position=-len(word), display=f"{cmd} - {desc}"
+                    )
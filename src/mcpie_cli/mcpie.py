@@ -1,29 +1,34 @@
+from __future__ import annotations
+
 import asyncio
+import concurrent.futures
+import functools
 import json
 import logging
+import math
+import re
+import select
 import shlex
 import sys
+import threading
+from typing import TYPE_CHECKING
 from urllib.parse import urljoin
 
 import click
+import orjson
 import yaml
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.sse import sse_client
-from mcp.client.stdio import stdio_client
-from mcp.client.streamable_http import streamablehttp_client
-from mcp.types import Result
-from prompt_toolkit import PromptSession
-from prompt_toolkit.completion import Completer, Completion
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.lexers import PygmentsLexer
-from prompt_toolkit.styles import Style
-from pygments.lexers.data import JsonLexer
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.panel import Panel
 from rich.syntax import Syntax
 from rich.table import Table
 
+if TYPE_CHECKING:
+    # The mcp package dominates import time; it is only loaded at runtime once
+    # a transport actually connects
+    from mcp import ClientSession
+    from mcp.types import Result
+
 # Configure logging to use Rich and output to stderr
 # This prevents server logs from polluting stdout when piping
 logging.basicConfig(
@@ -56,6 +61,24 @@ console = Console()
 # Separate console for status messages and non-essential output (stderr)
 console_err = Console(stderr=True)
 
+# Output formats accepted by --output, built once and shared by the CLI option
+OUTPUT_FORMATS = ("json", "pretty", "table", "yaml", "raw")
+OUTPUT_FORMAT_CHOICE = click.Choice(OUTPUT_FORMATS)
+
+# Formats that map to a different default in interactive (REPL) mode
+INTERACTIVE_OUTPUT_FORMATS = {"json": "pretty"}
+
+# Buffer size for --output-file, large enough that typical outputs are
+# written to the file in one go
+OUTPUT_FILE_BUFFER_SIZE = 1 << 16
+
+# Use libyaml's C emitter when PyYAML was built with it; it is several times
+# faster than the pure-Python dumper and emits equivalent documents
+try:
+    from yaml import CDumper as YamlDumper
+except ImportError:
+    from yaml import Dumper as YamlDumper
+
 
 class OutputConfig:
     """Configuration for output formatting."""
@@ -69,6 +92,51 @@ class OutputConfig:
         self.output_file = output_file
 
 
+def dump_item(item, columns: list[str] | tuple[str, ...] = ()) -> dict:
+    """Convert a result or list item to a plain dict, calling model_dump once."""
+    if isinstance(item, dict):
+        return item
+    if hasattr(item, "model_dump"):
+        return item.model_dump(exclude_defaults=True)
+    # Convert to dict using specified columns
+    return {col: getattr(item, col) for col in columns if hasattr(item, col)}
+
+
+def has_non_finite_float(data) -> bool:
+    """Check whether data contains a NaN or infinite float at any depth."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite_float(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite_float(value) for value in data)
+    return False
+
+
+def dumps_json(data, pretty: bool = False) -> str:
+    """Serialize data to JSON text, with the stdlib's ASCII escaping.
+
+    orjson is used for the common case. The stdlib takes over for what orjson
+    rejects (integers beyond 64 bits, non-str dict keys) or would change:
+    NaN/Infinity become null, and non-ASCII text is written raw instead of as
+    \\uXXXX escapes, which non-UTF-8 consoles cannot always encode.
+    """
+    try:
+        encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        # orjson writes non-finite floats as null, so only then is a scan needed
+        if encoded.isascii() and (
+            b"null" not in encoded or not has_non_finite_float(data)
+        ):
+            return encoded.decode()
+    except orjson.JSONEncodeError:
+        pass
+    return json.dumps(
+        data,
+        indent=2 if pretty else None,
+        separators=(",", ": ") if pretty else (",", ":"),
+    )
+
+
 class BaseOutputFormatter:
     """Base class for output formatters."""
 
@@ -76,17 +144,30 @@ class BaseOutputFormatter:
         self.config = config
         self.output_stream = None
         if config.output_file:
-            self.output_stream = open(config.output_file, "w")
+            self.output_stream = open(
+                config.output_file, "wb", buffering=OUTPUT_FILE_BUFFER_SIZE
+            )
 
     def __del__(self):
+        self.close()
+
+    def close(self):
+        """Flush and close the output file, if any."""
         if self.output_stream:
             self.output_stream.close()
 
-    def write(self, content: str):
-        """Write content to appropriate stream."""
+    def flush(self):
+        """Flush buffered output to the output file, if any."""
         if self.output_stream:
-            self.output_stream.write(content)
             self.output_stream.flush()
+
+    def write(self, content: str):
+        """Write content to appropriate stream.
+
+        File output stays buffered until flush() or close().
+        """
+        if self.output_stream:
+            self.output_stream.write(content.encode())
         else:
             print(content, end="")
 
@@ -111,28 +192,16 @@ class JsonOutputFormatter(BaseOutputFormatter):
         if not result:
             return "{}"
 
-        result_dict = result.model_dump(exclude_defaults=True)
-        return json.dumps(result_dict, indent=None)
+        result_dict = dump_item(result)
+        return dumps_json(result_dict)
 
     def format_list(self, items: list, title: str, columns: list[str]) -> str:
         if not items:
             return "[]"
 
-        formatted_items = []
-        for item in items:
-            if hasattr(item, "model_dump"):
-                formatted_items.append(item.model_dump(exclude_defaults=True))
-            elif isinstance(item, dict):
-                formatted_items.append(item)
-            else:
-                # Convert to dict using specified columns
-                item_dict = {}
-                for col in columns:
-                    if hasattr(item, col):
-                        item_dict[col] = getattr(item, col)
-                formatted_items.append(item_dict)
+        formatted_items = [dump_item(item, columns) for item in items]
 
-        return json.dumps(formatted_items, indent=None)
+        return dumps_json(formatted_items)
 
 
 class PrettyOutputFormatter(BaseOutputFormatter):
@@ -142,28 +211,16 @@ class PrettyOutputFormatter(BaseOutputFormatter):
         if not result:
             return "{}"
 
-        result_dict = result.model_dump(exclude_defaults=True)
-        return json.dumps(result_dict, indent=2)
+        result_dict = dump_item(result)
+        return dumps_json(result_dict, pretty=True)
 
     def format_list(self, items: list, title: str, columns: list[str]) -> str:
         if not items:
             return "[]"
 
-        formatted_items = []
-        for item in items:
-            if hasattr(item, "model_dump"):
-                formatted_items.append(item.model_dump(exclude_defaults=True))
-            elif isinstance(item, dict):
-                formatted_items.append(item)
-            else:
-                # Convert to dict using specified columns
-                item_dict = {}
-                for col in columns:
-                    if hasattr(item, col):
-                        item_dict[col] = getattr(item, col)
-                formatted_items.append(item_dict)
+        formatted_items = [dump_item(item, columns) for item in items]
 
-        return json.dumps(formatted_items, indent=2)
+        return dumps_json(formatted_items, pretty=True)
 
 
 class TableOutputFormatter(BaseOutputFormatter):
@@ -173,7 +230,7 @@ class TableOutputFormatter(BaseOutputFormatter):
         if not result:
             return "No result"
 
-        result_dict = result.model_dump(exclude_defaults=True)
+        result_dict = dump_item(result)
 
         # For single objects, format as key-value pairs
         if isinstance(result_dict, dict):
@@ -190,47 +247,36 @@ class TableOutputFormatter(BaseOutputFormatter):
         if not items:
             return f"No {title.lower()} available"
 
-        # Calculate column widths
-        col_widths = {}
-        for col in columns:
-            col_widths[col] = len(col)
-
-        # Get all values and calculate max widths
-        all_rows = []
-        for item in items:
-            row = {}
-            for col in columns:
-                if hasattr(item, col):
-                    value = getattr(item, col)
-                elif isinstance(item, dict) and col in item:
-                    value = item[col]
-                else:
-                    value = ""
-
-                if isinstance(value, (dict, list)):
-                    value = json.dumps(value, indent=2)
-                elif value is None:
-                    value = ""
-
-                value_str = str(value)
-                row[col] = value_str
-                col_widths[col] = max(col_widths[col], len(value_str))
-            all_rows.append(row)
-
-        # Format table
-        lines = []
-
-        # Header
-        header = " | ".join(col.ljust(col_widths[col]) for col in columns)
-        lines.append(header)
-        lines.append("-" * len(header))
+        # Stringify every cell once, then size each column in a single pass
+        rows = [[self.cell(item, col) for col in columns] for item in items]
+        col_widths = [
+            max(len(col), *(len(value) for value in values))
+            for col, values in zip(columns, zip(*rows))
+        ]
+
+        header = " | ".join(col.ljust(width) for col, width in zip(columns, col_widths))
+        lines = [header, "-" * len(header)]
+        lines += [
+            " | ".join(value.ljust(width) for value, width in zip(row, col_widths))
+            for row in rows
+        ]
+        return "\n".join(lines)
 
-        # Rows
-        for row in all_rows:
-            line = " | ".join(row[col].ljust(col_widths[col]) for col in columns)
-            lines.append(line)
+    @staticmethod
+    def cell(item, col: str) -> str:
+        """Return the table cell text for one item's column."""
+        if hasattr(item, col):
+            value = getattr(item, col)
+        elif isinstance(item, dict) and col in item:
+            value = item[col]
+        else:
+            value = ""
 
-        return "\n".join(lines)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, indent=2)
+        if value is None:
+            return ""
+        return str(value)
 
 
 class YamlOutputFormatter(BaseOutputFormatter):
@@ -240,28 +286,16 @@ class YamlOutputFormatter(BaseOutputFormatter):
         if not result:
             return "null"
 
-        result_dict = result.model_dump(exclude_defaults=True)
-        return yaml.dump(result_dict, default_flow_style=False)
+        result_dict = dump_item(result)
+        return yaml.dump(result_dict, Dumper=YamlDumper, default_flow_style=False)
 
     def format_list(self, items: list, title: str, columns: list[str]) -> str:
         if not items:
             return "[]"
 
-        formatted_items = []
-        for item in items:
-            if hasattr(item, "model_dump"):
-                formatted_items.append(item.model_dump(exclude_defaults=True))
-            elif isinstance(item, dict):
-                formatted_items.append(item)
-            else:
-                # Convert to dict using specified columns
-                item_dict = {}
-                for col in columns:
-                    if hasattr(item, col):
-                        item_dict[col] = getattr(item, col)
-                formatted_items.append(item_dict)
+        formatted_items = [dump_item(item, columns) for item in items]
 
-        return yaml.dump(formatted_items, default_flow_style=False)
+        return yaml.dump(formatted_items, Dumper=YamlDumper, default_flow_style=False)
 
 
 class RawOutputFormatter(BaseOutputFormatter):
@@ -272,7 +306,7 @@ class RawOutputFormatter(BaseOutputFormatter):
             return ""
 
         # For raw output, try to extract the most relevant content
-        result_dict = result.model_dump(exclude_defaults=True)
+        result_dict = dump_item(result)
 
         # Check for content array (common in MCP responses)
         if isinstance(result_dict, dict) and "content" in result_dict:
@@ -310,39 +344,36 @@ class RawOutputFormatter(BaseOutputFormatter):
             return ""
 
         # For raw output, just return the most relevant field from each item
-        lines = []
-        for item in items:
-            if hasattr(item, "name"):
-                lines.append(str(getattr(item, "name")))
-            elif hasattr(item, "uri"):
-                lines.append(str(getattr(item, "uri")))
-            elif isinstance(item, dict):
-                if "name" in item:
-                    lines.append(str(item["name"]))
-                elif "uri" in item:
-                    lines.append(str(item["uri"]))
-                else:
-                    lines.append(str(item))
-            else:
-                lines.append(str(item))
-
-        return "\n".join(lines)
+        return "\n".join([str(self.raw_field(item)) for item in items])
+
+    @staticmethod
+    def raw_field(item):
+        """Return an item's name, else its URI, else the item itself."""
+        if hasattr(item, "name"):
+            return item.name
+        if hasattr(item, "uri"):
+            return item.uri
+        if isinstance(item, dict):
+            if "name" in item:
+                return item["name"]
+            if "uri" in item:
+                return item["uri"]
+        return item
+
+
+# Formatter class for each --output format, looked up once per session
+OUTPUT_FORMATTERS: dict[str, type[BaseOutputFormatter]] = {
+    "json": JsonOutputFormatter,
+    "pretty": PrettyOutputFormatter,
+    "table": TableOutputFormatter,
+    "yaml": YamlOutputFormatter,
+    "raw": RawOutputFormatter,
+}
 
 
 def get_output_formatter(config: OutputConfig) -> BaseOutputFormatter:
     """Get the appropriate output formatter based on config."""
-    if config.output_format == "json":
-        return JsonOutputFormatter(config)
-    elif config.output_format == "pretty":
-        return PrettyOutputFormatter(config)
-    elif config.output_format == "table":
-        return TableOutputFormatter(config)
-    elif config.output_format == "yaml":
-        return YamlOutputFormatter(config)
-    elif config.output_format == "raw":
-        return RawOutputFormatter(config)
-    else:
-        return JsonOutputFormatter(config)
+    return OUTPUT_FORMATTERS.get(config.output_format, JsonOutputFormatter)(config)
 
 
 # Exit codes as defined in the spec
@@ -351,18 +382,26 @@ EXIT_CLI_ERROR = 1
 EXIT_SERVER_ERROR = 2
 EXIT_INVALID_INPUT = 3
 
+# Errors mentioning the server or MCP are reported with EXIT_SERVER_ERROR
+SERVER_ERROR_PATTERN = re.compile(r"server|mcp", re.IGNORECASE)
+
+
+def is_server_error(message: str) -> bool:
+    """Return True if an error message points at the server rather than the CLI."""
+    return SERVER_ERROR_PATTERN.search(message) is not None
+
 
-def exit_with_code(code: int, message: str = "", quiet: bool = False):
+def exit_with_code(code: int, message: str | None = "", quiet: bool = False):
     """Exit with appropriate code and message."""
     if message and not quiet:
-        if code == EXIT_SUCCESS:
-            print(message)
-        else:
-            print(message, file=sys.stderr)
+        # One write per message so concurrent error output doesn't interleave
+        stream = sys.stdout if code == EXIT_SUCCESS else sys.stderr
+        stream.write(f"{message}\n")
+        stream.flush()
     sys.exit(code)
 
 
-def print_error(message: str, session: "MCPSession | None" = None):
+def print_error(message: str, session: MCPSession | None = None):
     """Print error message to stderr, respecting quiet mode."""
     if session and session.output_config and session.output_config.quiet:
         return
@@ -372,7 +411,7 @@ def print_error(message: str, session: "MCPSession | None" = None):
         print(f"Error: {message}", file=sys.stderr)
 
 
-def print_warning(message: str, session: "MCPSession | None" = None):
+def print_warning(message: str, session: MCPSession | None = None):
     """Print warning message to stderr, respecting quiet mode."""
     if session and session.output_config and session.output_config.quiet:
         return
@@ -449,184 +488,6 @@ COMMANDS = {
 }
 
 
-class MCPCompleter(Completer):
-    """Custom completer for MCP commands with auto-completion for tools, prompts, and resources."""
-
-    def __init__(self, session: "MCPSession"):
-        self.session = session
-        self.base_commands = {
-            "help": "Show help information",
-            "quit": "Exit the REPL",
-            "exit": "Exit the REPL",
-            "clear": "Clear the screen",
-            "ls": "List resources (alias for resources/list)",
-            "discover": "Show all available resources, tools, and prompts",
-        }
-        # Cache for auto-completion data
-        self._tools_cache = None
-        self._prompts_cache = None
-        self._resources_cache = None
-        self._cache_populated = False
-
-    def _populate_cache_sync(self):
-        """Populate cache synchronously if possible."""
-        if self._cache_populated or not self.session.initialized:
-            return
-
-        try:
-            # Try to get cached data if session has it
-            if hasattr(self.session, "_completion_cache"):
-                cache = self.session._completion_cache
-                self._tools_cache = cache.get("tools", [])
-                self._prompts_cache = cache.get("prompts", [])
-                self._resources_cache = cache.get("resources", [])
-                self._cache_populated = True
-        except:  # noqa: E722
-            pass
-
-    async def _get_tools(self) -> list[str]:
-        """Get list of available tool names."""
-        if self._tools_cache is None and self.session.initialized:
-            try:
-                result = await self.session.execute_command("tools", "list")
-                if result and hasattr(result, "tools"):
-                    self._tools_cache = [tool.name for tool in result.tools]
-                    # Store in session for sync access
-                    if not hasattr(self.session, "_completion_cache"):
-                        self.session._completion_cache = {}
-                    self.session._completion_cache["tools"] = self._tools_cache
-                else:
-                    self._tools_cache = []
-            except:  # noqa: E722
-                self._tools_cache = []
-        return self._tools_cache or []
-
-    async def _get_prompts(self) -> list[str]:
-        """Get list of available prompt names."""
-        if self._prompts_cache is None and self.session.initialized:
-            try:
-                result = await self.session.execute_command("prompts", "list")
-                if result and hasattr(result, "prompts"):
-                    self._prompts_cache = [prompt.name for prompt in result.prompts]
-                    # Store in session for sync access
-                    if not hasattr(self.session, "_completion_cache"):
-                        self.session._completion_cache = {}
-                    self.session._completion_cache["prompts"] = self._prompts_cache
-                else:
-                    self._prompts_cache = []
-            except:  # noqa: E722
-                self._prompts_cache = []
-        return self._prompts_cache or []
-
-    async def _get_resources(self) -> list[str]:
-        """Get list of available resource URIs."""
-        if self._resources_cache is None and self.session.initialized:
-            try:
-                result = await self.session.execute_command("resources", "list")
-                if result and hasattr(result, "resources"):
-                    self._resources_cache = [
-                        str(resource.uri) for resource in result.resources
-                    ]
-                    # Store in session for sync access
-                    if not hasattr(self.session, "_completion_cache"):
-                        self.session._completion_cache = {}
-                    self.session._completion_cache["resources"] = self._resources_cache
-                else:
-                    self._resources_cache = []
-            except:  # noqa: E722
-                self._resources_cache = []
-        return self._resources_cache or []
-
-    def get_completions(self, document, complete_event):
-        word = document.get_word_before_cursor()
-        line = document.text_before_cursor
-        parts = line.split()
-
-        # Populate cache from session if available
-        self._populate_cache_sync()
-
-        # Auto-complete tool names for "t call <tool_name>" and "t inspect <tool_name>"
-        if (
-            len(parts) >= 2
-            and parts[0] in ["t", "tools"]
-            and parts[1] in ["call", "inspect"]
-            and len(parts) == 3
-        ):
-            tools = self._tools_cache or []
-            for tool in tools:
-                if tool.startswith(word):
-                    yield Completion(
-                        tool,
-                        start_position=-len(word),
-                        display=f"{tool} (tool)",
-                    )
-            return
-
-        # Auto-complete prompt names for "p get <prompt_name>" and "p inspect <prompt_name>"
-        if (
-            len(parts) >= 2
-            and parts[0] in ["p", "prompts"]
-            and parts[1] in ["get", "inspect"]
-            and len(parts) == 3
-        ):
-            prompts = self._prompts_cache or []
-            for prompt in prompts:
-                if prompt.startswith(word):
-                    yield Completion(
-                        prompt,
-                        start_position=-len(word),
-                        display=f"{prompt} (prompt)",
-                    )
-            return
-
-        # Auto-complete resource URIs for "r read <uri>" and "r inspect <uri>"
-        if (
-            len(parts) >= 2
-            and parts[0] in ["r", "resources"]
-            and parts[1] in ["read", "inspect"]
-            and len(parts) == 3
-        ):
-            resources = self._resources_cache or []
-            for resource in resources:
-                if resource.startswith(word):
-                    yield Completion(
-                        resource,
-                        start_position=-len(word),
-                        display=f"{resource} (resource)",
-                    )
-            return
-
-        # Handle subcommands - only show when we have exactly 2 parts (command + partial subcommand)
-        for cmd_name, cmd_config in COMMANDS.items():
-            for alias in [cmd_name] + cmd_config.aliases:
-                if line.startswith(f"{alias} ") and len(parts) == 2:
-                    subcommands = []
-                    for sub_name, sub_config in cmd_config.subcommands.items():
-                        subcommands.append(sub_name)
-                        subcommands.extend(sub_config.get("aliases", []))
-
-                    for subcmd in subcommands:
-                        if subcmd.startswith(word):
-                            yield Completion(
-                                subcmd, start_position=-len(word), display=subcmd
-                            )
-                    return
-
-        # Main commands - only show when we don't have any parts yet or just one partial word
-        if len(parts) <= 1:
-            all_commands = {**self.base_commands}
-            for cmd_name, cmd_config in COMMANDS.items():
-                all_commands[cmd_name] = f"{cmd_name.title()} commands"
-                for alias in cmd_config.aliases:
-                    all_commands[alias] = f"{cmd_name.title()} commands"
-
-            for cmd, desc in all_commands.items():
-                if cmd.startswith(word):
-                    yield Completion(
-                        cmd, start_position=-len(word), display=f"{cmd} - {desc}"
-                    )
-
-
 class MCPSession:
     """Interactive MCP session manager."""
 
@@ -758,6 +619,9 @@ class MCPSession:
         self, url: str, headers: dict[str, str] | None = None
     ) -> None:
         """Connect using Streamable HTTP transport."""
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
         # Determine which console to use for status messages
         status_console = console_err if self.clean_output else console
 
@@ -786,6 +650,9 @@ class MCPSession:
         self, url: str, headers: dict[str, str] | None = None
     ) -> None:
         """Connect using SSE transport."""
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+
         # Determine which console to use for status messages
         status_console = console_err if self.clean_output else console
 
@@ -804,6 +671,9 @@ class MCPSession:
 
     async def _connect_stdio(self) -> None:
         """Connect using STDIO transport."""
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
         elements = shlex.split(self.cmd_or_url)
         if not elements:
             raise ValueError("stdio command is empty")
@@ -846,6 +716,8 @@ class MCPSession:
         if self.client:
             await self.client.__aexit__(None, None, None)
         self.initialized = False
+        if self.output_formatter:
+            self.output_formatter.close()
 
     async def execute_command(
         self, cmd_type: str, subcmd: str, *args, **kwargs
@@ -970,10 +842,11 @@ def print_result_structured(
         session.output_formatter.write(formatted_output)
         if formatted_output and not formatted_output.endswith("\n"):
             session.output_formatter.write("\n")
+        session.output_formatter.flush()
     elif session.clean_output:
         # Fallback to old clean output behavior
         try:
-            result_dict = result.model_dump(exclude_defaults=True)
+            result_dict = dump_item(result)
 
             # For tool calls, extract structuredContent if available
             if "content" in result_dict and isinstance(result_dict["content"], list):
@@ -1045,7 +918,7 @@ def print_table(
     data: list[object],
     title: str,
     columns: list[str],
-    session: "MCPSession | None" = None,
+    session: MCPSession | None = None,
 ) -> None:
     """Print data in a table format using the configured output formatter."""
     if not data:
@@ -1054,6 +927,7 @@ def print_table(
             session.output_formatter.write(formatted_output)
             if formatted_output and not formatted_output.endswith("\n"):
                 session.output_formatter.write("\n")
+            session.output_formatter.flush()
         else:
             console.print(f"[yellow]No {title.lower()} available[/yellow]")
         return
@@ -1064,6 +938,7 @@ def print_table(
         session.output_formatter.write(formatted_output)
         if formatted_output and not formatted_output.endswith("\n"):
             session.output_formatter.write("\n")
+        session.output_formatter.flush()
     else:
         # Fallback to rich table output
         table = Table(title=title, show_header=True, header_style="bold magenta")
@@ -1112,6 +987,21 @@ def print_inspection(info: dict[str, object], title: str) -> None:
     console.print(table)
 
 
+def parse_key_value_pairs(items: tuple[str, ...]) -> dict[str, str]:
+    """Parse "key:value" items into a dict, skipping items without a colon."""
+    pairs = {}
+    for item in items:
+        key, sep, value = item.partition(":")
+        if sep:
+            pairs[key] = value
+    return pairs
+
+
+def resolve_output_format(output: str, interactive: bool) -> str:
+    """Return the output format to use, applying the REPL defaults."""
+    return INTERACTIVE_OUTPUT_FORMATS.get(output, output) if interactive else output
+
+
 def parse_arguments_smart(
     arg_str: str, schema: dict[str, object] | None = None
 ) -> dict[str, object]:
@@ -1639,9 +1529,19 @@ async def handle_command(mcp_session: MCPSession, cmd: str, parts: list[str]) ->
 
 async def run_repl(mcp_session: MCPSession) -> None:
     """Run the interactive REPL."""
+    # The REPL stack is only needed in interactive mode, so load it here
+    # rather than on every command-line invocation
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
+    from prompt_toolkit.lexers import PygmentsLexer
+    from prompt_toolkit.styles import Style
+    from pygments.lexers.data import JsonLexer
+
+    from .completer import MCPCompleter
+
     # Setup prompt session
     session = PromptSession(
-        completer=MCPCompleter(mcp_session),
+        completer=MCPCompleter(mcp_session, COMMANDS),
         history=FileHistory(".mcp_history"),
         lexer=PygmentsLexer(JsonLexer),
         style=Style.from_dict(
@@ -1700,6 +1600,86 @@ async def run_repl(mcp_session: MCPSession) -> None:
             console.print(f"[red]Error: {e}[/red]")
 
 
+STDIN_REQUIRED_MESSAGE = "Error: --stdin flag requires input from stdin"
+
+
+@functools.cache
+def stdin_is_tty() -> bool:
+    """Return whether stdin is a terminal, checked once per process.
+
+    Call stdin_is_tty.cache_clear() after replacing sys.stdin.
+    """
+    return sys.stdin.isatty()
+
+
+def stdin_at_eof() -> bool:
+    """Return whether stdin is already known to be empty, without blocking.
+
+    Only a pipe or file whose writer is done can be checked; input that is
+    still being produced, or a stdin without a file descriptor, gives False.
+    """
+    buffer = getattr(sys.stdin, "buffer", None)
+    if not hasattr(buffer, "peek"):
+        return False
+    try:
+        readable, _, _ = select.select([sys.stdin.fileno()], [], [], 0)
+    except (OSError, ValueError):
+        # No descriptor, or select() does not support pipes (Windows)
+        return False
+    # Readable means data or EOF is waiting, so peek() returns immediately
+    return bool(readable) and not buffer.peek(1)
+
+
+def read_stdin() -> str:
+    """Read all of stdin, stripped of surrounding whitespace."""
+    return sys.stdin.read().strip()
+
+
+def start_stdin_reader() -> concurrent.futures.Future:
+    """Start reading stdin in a daemon thread, returning a future for the input.
+
+    A daemon thread is used rather than the default executor so an abandoned
+    read, e.g. after Ctrl+C, never holds up executor or interpreter shutdown.
+    """
+    reading: concurrent.futures.Future = concurrent.futures.Future()
+
+    def read_into_future() -> None:
+        try:
+            reading.set_result(read_stdin())
+        except BaseException as e:
+            reading.set_exception(e)
+
+    threading.Thread(target=read_into_future, name="stdin-reader", daemon=True).start()
+    return reading
+
+
+async def connect_reading_stdin(mcp_session: MCPSession, quiet: bool) -> str:
+    """Connect to the server while stdin is read in a background thread.
+
+    Piped input is read during the MCP handshake instead of before it. main()
+    rejects stdin that is already at EOF before connecting (stdin_at_eof),
+    but whitespace-only or late input is only found empty after the server
+    has been started: it exits with EXIT_INVALID_INPUT once connected, and
+    also takes priority over a connection failure. Interrupts and cancellation propagate without waiting
+    for stdin to reach EOF.
+    """
+    # connect() stays in this task: the transports enter anyio cancel scopes
+    # that must be exited from the task that entered them
+    read_future = asyncio.wrap_future(start_stdin_reader())
+    try:
+        await mcp_session.connect()
+    except Exception:
+        if not await read_future:
+            exit_with_code(EXIT_INVALID_INPUT, STDIN_REQUIRED_MESSAGE, quiet)
+        raise
+
+    stdin_input = await read_future
+    # If stdin is empty after stripping, treat it as no input
+    if not stdin_input:
+        exit_with_code(EXIT_INVALID_INPUT, STDIN_REQUIRED_MESSAGE, quiet)
+    return stdin_input
+
+
 @click.command()
 @click.argument("cmd_or_url", required=True)
 @click.option(
@@ -1726,7 +1706,7 @@ async def run_repl(mcp_session: MCPSession) -> None:
 @click.option(
     "-o",
     "--output",
-    type=click.Choice(["json", "pretty", "table", "yaml", "raw"]),
+    type=OUTPUT_FORMAT_CHOICE,
     default="json",
     help="Output format (default: json in non-REPL mode, pretty in REPL mode)",
 )
@@ -1810,37 +1790,19 @@ def main(
     # Otherwise keep the default WARNING level
 
     # Parse metadata
-    metadata = {}
-    for item in env + header:
-        if ":" in item:
-            key, value = item.split(":", 1)
-            metadata[key] = value
+    metadata = parse_key_value_pairs(env + header)
 
     # Handle stdin input if requested
+    # The input itself is read while connecting, see connect_reading_stdin();
+    # a terminal or an already empty, closed pipe is rejected before that
     stdin_input = None
-    if stdin:
-        if not sys.stdin.isatty():
-            stdin_input = sys.stdin.read().strip()
-            # If stdin is empty after stripping, treat it as no input
-            if not stdin_input:
-                exit_with_code(
-                    EXIT_INVALID_INPUT,
-                    "Error: --stdin flag requires input from stdin",
-                    quiet,
-                )
-        else:
-            exit_with_code(
-                EXIT_INVALID_INPUT,
-                "Error: --stdin flag requires input from stdin",
-                quiet,
-            )
+    if stdin and (stdin_is_tty() or stdin_at_eof()):
+        exit_with_code(EXIT_INVALID_INPUT, STDIN_REQUIRED_MESSAGE, quiet)
 
     # Create output configuration
     # In interactive mode, default to pretty output unless specified
     # In command-line mode, use specified output format (default: json)
-    actual_output_format = output
-    if not commands and output == "json":
-        actual_output_format = "pretty"  # Default to pretty in REPL mode
+    actual_output_format = resolve_output_format(output, interactive=not commands)
 
     output_config = OutputConfig(
         output_format=actual_output_format,
@@ -1850,6 +1812,7 @@ def main(
     )
 
     async def run():
+        nonlocal stdin_input
         mcp_session = MCPSession(
             cmd_or_url,
             metadata,
@@ -1861,7 +1824,10 @@ def main(
         # In command-line mode, use clean output unless --verbose
         mcp_session.clean_output = not verbose and bool(commands)
         try:
-            await mcp_session.connect()
+            if stdin:
+                stdin_input = await connect_reading_stdin(mcp_session, quiet)
+            else:
+                await mcp_session.connect()
 
             # Check if we have commands to execute (non-interactive mode)
             if commands:
@@ -1881,12 +1847,17 @@ def main(
         exit_with_code(EXIT_INVALID_INPUT, f"Invalid JSON input: {e}", quiet)
     except Exception as e:
         # Check if it's a server-related error
-        if "server" in str(e).lower() or "mcp" in str(e).lower():
+        if is_server_error(str(e)):
             exit_with_code(EXIT_SERVER_ERROR, f"Server error: {e}", quiet)
         else:
             exit_with_code(EXIT_CLI_ERROR, f"Fatal error: {e}", quiet)
 
 
+def looks_like_json(text: str) -> bool:
+    """Cheap check for whether text could be a JSON object or array."""
+    return text.lstrip()[:1] in ("{", "[")
+
+
 async def run_commands(
     mcp_session: MCPSession, commands: tuple[str], stdin_input: str | None = None
 ) -> None:
@@ -1896,32 +1867,16 @@ async def run_commands(
 
     # Handle stdin input
     if stdin_input:
-        # Try to parse stdin as JSON first
-        try:
-            stdin_data = json.loads(stdin_input)
-            # If it's a dict, it could be arguments for a command
-            if isinstance(stdin_data, dict) and command_string:
-                # For commands that accept arguments, use the JSON as arguments
-                parts = command_string.split()
-                if len(parts) >= 2 and parts[1] in ["call", "get"]:
-                    # Convert dict to JSON string and append to command
-                    command_string += f" '{json.dumps(stdin_data)}'"
-                elif len(parts) >= 2 and parts[1] == "read":
-                    # For read commands, extract the URI/name from the JSON
-                    if isinstance(stdin_data, dict) and "uri" in stdin_data:
-                        command_string += f" {stdin_data['uri']}"
-                    elif isinstance(stdin_data, dict) and "name" in stdin_data:
-                        command_string += f" {stdin_data['name']}"
-            elif isinstance(stdin_data, dict) and not command_string:
-                # If we have JSON input but no command, check if it contains URI/name for resource read
-                if "uri" in stdin_data:
-                    command_string = f"resource read {stdin_data['uri']}"
-                elif "name" in stdin_data:
-                    command_string = f"resource read {stdin_data['name']}"
-                else:
-                    # Generic JSON without URI/name, default to resource read with the whole JSON
-                    command_string = f"resource read '{json.dumps(stdin_data)}'"
-        except json.JSONDecodeError:
+        # Try to parse stdin as JSON first, unless it plainly isn't a JSON
+        # object or array (URIs, plain text), which skips the parser entirely
+        stdin_data = None
+        if looks_like_json(stdin_input):
+            try:
+                stdin_data = orjson.loads(stdin_input)
+            except orjson.JSONDecodeError:
+                pass
+
+        if stdin_data is None:
             # If not valid JSON, treat as plain text
             if stdin_input and not command_string:
                 # If we have stdin input but no command, assume it's a resource URI to read
@@ -1933,10 +1888,32 @@ async def run_commands(
             ):
                 # If command is like "resource read" and we have stdin, use stdin as the URI
                 command_string += f" {stdin_input}"
+        # If it's a dict, it could be arguments for a command
+        elif isinstance(stdin_data, dict) and command_string:
+            # For commands that accept arguments, use the JSON as arguments
+            parts = command_string.split()
+            if len(parts) >= 2 and parts[1] in ["call", "get"]:
+                # Convert dict to JSON string and append to command
+                command_string += f" '{json.dumps(stdin_data)}'"
+            elif len(parts) >= 2 and parts[1] == "read":
+                # For read commands, extract the URI/name from the JSON
+                if "uri" in stdin_data:
+                    command_string += f" {stdin_data['uri']}"
+                elif "name" in stdin_data:
+                    command_string += f" {stdin_data['name']}"
+        elif isinstance(stdin_data, dict) and not command_string:
+            # If we have JSON input but no command, check if it contains URI/name for resource read
+            if "uri" in stdin_data:
+                command_string = f"resource read {stdin_data['uri']}"
+            elif "name" in stdin_data:
+                command_string = f"resource read {stdin_data['name']}"
+            else:
+                # Generic JSON without URI/name, default to resource read with the whole JSON
+                command_string = f"resource read '{json.dumps(stdin_data)}'"
 
     # Check if we should read from stdin (for backward compatibility)
     # Only do this if stdin_input was not explicitly provided (None vs empty string)
-    elif stdin_input is None and not sys.stdin.isatty():
+    elif stdin_input is None and not stdin_is_tty():
         stdin_input = sys.stdin.read().strip()
         if stdin_input and not command_string:
             # If we have stdin input but no command, assume it's a resource URI to read
@@ -0,0 +1,163 @@
+"""
+Shared fixtures for the mcpie test suite.
+"""
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from click.testing import CliRunner
+
+from mcpie_cli.mcpie import (
+    OUTPUT_FORMATS,
+    OUTPUT_FORMATTERS,
+    MCPSession,
+    OutputConfig,
+    stdin_is_tty,
+)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "real_event_loop: keep the real asyncio.run under no_event_loop"
+    )
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """A single CliRunner shared by every test that invokes the CLI."""
+    return CliRunner()
+
+
+@pytest.fixture
+def result_mock():
+    """A fresh Mock(spec=Result) for each test."""
+    # Imported here so collecting tests that don't need it skips loading mcp
+    from mcp.types import Result
+
+    return Mock(spec=Result)
+
+
+@pytest.fixture(scope="module")
+def data_result():
+    """A stand-in Result whose model_dump returns {"test": "data"}.
+
+    The formatters only call model_dump, so a namespace is enough and avoids
+    building a Mock. Tests never modify it, so one per module is shared;
+    build a fresh namespace for a different payload.
+    """
+    return SimpleNamespace(model_dump=lambda **kwargs: {"test": "data"})
+
+
+@pytest.fixture
+def session_mock():
+    """A fresh Mock(spec=MCPSession) for each test."""
+    return Mock(spec=MCPSession)
+
+
+@pytest.fixture(scope="session")
+def output_configs():
+    """A default OutputConfig per --output format, shared by every test.
+
+    Nothing mutates an OutputConfig after construction, so one instance per
+    format is safe to share.
+    """
+    return {fmt: OutputConfig(fmt, False, False, None) for fmt in OUTPUT_FORMATS}
+
+
+@pytest.fixture(scope="class")
+def formatter(request, output_configs):
+    """A formatter shared by a test class, for the format it is parametrized with.
+
+    Use with ``@pytest.mark.parametrize("formatter", [fmt], indirect=True,
+    scope="class")``. Formatters without an output file hold no state, so
+    one instance serves every test in the class.
+    """
+    output_format = request.param
+    return OUTPUT_FORMATTERS[output_format](output_configs[output_format])
+
+
+@pytest.fixture(autouse=True)
+def _reset_stdin_is_tty():
+    """Forget the cached TTY check so each test sees its own sys.stdin."""
+    stdin_is_tty.cache_clear()
+    yield
+    stdin_is_tty.cache_clear()
+
+
+@pytest.fixture
+def run_mock(monkeypatch):
+    """Replace asyncio.run with a Mock so CLI tests never start a loop.
+
+    Set side_effect on the returned Mock to make the run raise.
+    """
+    mock = Mock(return_value=None)
+
+    def fake_run(coro):
+        # Close the coroutine so it isn't reported as never awaited
+        coro.close()
+        return mock(coro)
+
+    monkeypatch.setattr("mcpie_cli.mcpie.asyncio.run", fake_run)
+    return mock
+
+
+@pytest.fixture
+def exit_calls(monkeypatch):
+    """Record sys.exit codes instead of raising SystemExit."""
+    calls = []
+    monkeypatch.setattr(sys, "exit", calls.append)
+    return calls
+
+
+@pytest.fixture
+def exit_mock(monkeypatch):
+    """Replace exit_with_code with a Mock so main returns instead of exiting."""
+    mock = Mock()
+    monkeypatch.setattr("mcpie_cli.mcpie.exit_with_code", mock)
+    return mock
+
+
+# Building AsyncMocks is far slower than resetting them, so every test reuses
+# one session mock. A shallow copy would share the child mocks (and their call
+# history) anyway, so the template is reset instead of copied.
+_SESSION_TEMPLATE = Mock()
+_SESSION_TEMPLATE.connect = AsyncMock()
+_SESSION_TEMPLATE.disconnect = AsyncMock()
+_SESSION_TEMPLATE_ATTRS = frozenset(vars(_SESSION_TEMPLATE))
+
+
+def _reset_session_template():
+    """Reset the shared session mock, including plain attributes set on it."""
+    session = _SESSION_TEMPLATE
+    session.reset_mock(return_value=True, side_effect=True)
+    # reset_mock keeps plain values such as the clean_output main() assigns
+    # delattr() would make the mock raise AttributeError for the name, so the
+    # values are dropped from the instance dict to behave like a fresh Mock
+    attrs = vars(session)
+    for name in attrs.keys() - _SESSION_TEMPLATE_ATTRS:
+        del attrs[name]
+    return session
+
+
+@pytest.fixture
+def mcp_mocks(monkeypatch):
+    """Swap MCPSession and the command/REPL runners for mocks."""
+    session = _reset_session_template()
+    repl_calls = []
+
+    # Tests only count REPL runs, so a plain coroutine is enough there
+    async def fake_run_repl(*args, **kwargs):
+        repl_calls.append((args, kwargs))
+
+    mocks = SimpleNamespace(
+        session=session,
+        session_class=Mock(return_value=session),
+        run_commands=AsyncMock(return_value=None),
+        repl_calls=repl_calls,
+    )
+    monkeypatch.setattr("mcpie_cli.mcpie.MCPSession", mocks.session_class)
+    monkeypatch.setattr("mcpie_cli.mcpie.run_commands", mocks.run_commands)
+    monkeypatch.setattr("mcpie_cli.mcpie.run_repl", fake_run_repl)
+    return mocks
@@ -2,126 +2,108 @@
 Tests for CLI options and argument parsing.
 """
 
-from unittest.mock import patch
-from click.testing import CliRunner
+import asyncio
+import io
+import os
+from unittest.mock import AsyncMock, Mock, patch
 import sys
 import pytest
 
-from mcpie_cli.mcpie import main, OutputConfig, exit_with_code
+from mcpie_cli.mcpie import (
+    OUTPUT_FORMAT_CHOICE,
+    OUTPUT_FORMATS,
+    STDIN_REQUIRED_MESSAGE,
+    main,
+    OutputConfig,
+    connect_reading_stdin,
+    exit_with_code,
+    parse_key_value_pairs,
+    read_stdin,
+    resolve_output_format,
+    stdin_at_eof,
+    stdin_is_tty,
+)
+
+
+COMMAND = ["--", "t", "call", "test"]
+
+
+def parse_args(args):
+    """Parse CLI arguments into a Click context without invoking main."""
+    return main.make_context("mcpie", list(args), resilient_parsing=True)
 
 
 class TestCLIOptions:
     """Test CLI option parsing."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.runner = CliRunner()
-
     def test_output_format_option(self):
         """Test --output option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main, ["test_server", "--output", "json", "--", "t", "call", "test"]
-            )
+        ctx = parse_args(["test_server", "--output", "json", *COMMAND])
 
-            # Check that the option was parsed correctly
-            mock_run.assert_called_once()
+        assert ctx.params["output"] == "json"
+        assert ctx.params["commands"] == ("t", "call", "test")
 
     def test_quiet_option(self):
         """Test --quiet option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main, ["test_server", "--quiet", "--", "t", "call", "test"]
-            )
+        ctx = parse_args(["test_server", "--quiet", *COMMAND])
 
-            mock_run.assert_called_once()
+        assert ctx.params["quiet"] is True
 
     def test_verbose_option(self):
         """Test --verbose option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main, ["test_server", "--verbose", "--", "t", "call", "test"]
-            )
+        ctx = parse_args(["test_server", "--verbose", *COMMAND])
 
-            mock_run.assert_called_once()
+        assert ctx.params["verbose"] is True
 
     def test_output_file_option(self):
         """Test -o/--output-file option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main, ["test_server", "-o", "output.json", "--", "t", "call", "test"]
-            )
+        ctx = parse_args(["test_server", "-o", "output.json", *COMMAND])
 
-            mock_run.assert_called_once()
+        assert ctx.params["output_file"] == "output.json"
 
     def test_stdin_option(self):
         """Test --stdin option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main,
-                ["test_server", "--stdin", "--", "t", "call", "test"],
-                input="test input",
-            )
+        ctx = parse_args(["test_server", "--stdin", *COMMAND])
 
-            mock_run.assert_called_once()
+        assert ctx.params["stdin"] is True
 
     def test_force_sse_option(self):
         """Test --force-sse option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main, ["test_server", "--force-sse", "--", "t", "call", "test"]
-            )
+        ctx = parse_args(["test_server", "--force-sse", *COMMAND])
 
-            mock_run.assert_called_once()
+        assert ctx.params["force_sse"] is True
 
     def test_multiple_options(self):
         """Test multiple options together."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main,
-                [
-                    "test_server",
-                    "--output",
-                    "yaml",
-                    "--quiet",
-                    "--verbose",
-                    "-o",
-                    "output.yaml",
-                    "--",
-                    "t",
-                    "call",
-                    "test",
-                ],
-            )
-
-            mock_run.assert_called_once()
+        ctx = parse_args(
+            [
+                "test_server",
+                "--output",
+                "yaml",
+                "--quiet",
+                "--verbose",
+                "-o",
+                "output.yaml",
+                *COMMAND,
+            ]
+        )
+
+        assert ctx.params["output"] == "yaml"
+        assert ctx.params["quiet"] is True
+        assert ctx.params["verbose"] is True
+        assert ctx.params["output_file"] == "output.yaml"
 
     def test_env_option(self):
         """Test -e/--env option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main, ["test_server", "-e", "KEY:value", "--", "t", "call", "test"]
-            )
+        ctx = parse_args(["test_server", "-e", "KEY:value", *COMMAND])
 
-            mock_run.assert_called_once()
+        assert ctx.params["env"] == ("KEY:value",)
 
     def test_header_option(self):
         """Test -H/--header option parsing."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            self.runner.invoke(
-                main,
-                [
-                    "test_server",
-                    "-H",
-                    "Authorization:Bearer token",
-                    "--",
-                    "t",
-                    "call",
-                    "test",
-                ],
-            )
-
-            mock_run.assert_called_once()
+        ctx = parse_args(["test_server", "-H", "Authorization:Bearer token", *COMMAND])
+
+        assert ctx.params["header"] == ("Authorization:Bearer token",)
 
 
 class TestOutputConfigCreation:
@@ -154,29 +136,16 @@ class TestOutputFormatDefaults:
 
     def test_interactive_mode_defaults_to_pretty(self):
         """Test that interactive mode defaults to pretty output."""
-        # This would be tested in integration, but we can test the logic
-        # In interactive mode (no commands), output should default to pretty
-        commands = ()
-        output = "json"
-
-        # Simulate the logic from main()
-        actual_output_format = output
-        if not commands and output == "json":
-            actual_output_format = "pretty"
-
-        assert actual_output_format == "pretty"
+        assert resolve_output_format("json", interactive=True) == "pretty"
 
     def test_command_mode_uses_specified_format(self):
         """Test that command mode uses specified format."""
-        commands = ("t", "call", "test")
-        output = "json"
-
-        # Simulate the logic from main()
-        actual_output_format = output
-        if not commands and output == "json":
-            actual_output_format = "pretty"
+        assert resolve_output_format("json", interactive=False) == "json"
 
-        assert actual_output_format == "json"
+    @pytest.mark.parametrize("fmt", ["pretty", "table", "yaml", "raw"])
+    def test_interactive_mode_keeps_other_formats(self, fmt):
+        """Test that only formats with a REPL default are remapped."""
+        assert resolve_output_format(fmt, interactive=True) == fmt
 
 
 class TestStdinHandling:
@@ -187,48 +156,131 @@ class TestStdinHandling:
         with patch("sys.stdin.isatty", return_value=True):
             # Test that exit_with_code raises SystemExit with code 3
             with pytest.raises(SystemExit) as exc_info:
-                exit_with_code(
-                    3, "Error: --stdin flag requires input from stdin", False
-                )
+                if stdin_is_tty():
+                    exit_with_code(3, STDIN_REQUIRED_MESSAGE, False)
             assert exc_info.value.code == 3
 
+    def test_stdin_tty_check_is_cached(self):
+        """Test that the TTY check runs once until the cache is cleared."""
+        with patch("sys.stdin.isatty", return_value=True) as mock_isatty:
+            assert stdin_is_tty()
+            assert stdin_is_tty()
+            assert mock_isatty.call_count == 1
+
+        with patch("sys.stdin.isatty", return_value=False):
+            assert stdin_is_tty()
+            stdin_is_tty.cache_clear()
+            assert not stdin_is_tty()
+
     def test_stdin_with_input(self):
         """Test --stdin flag with actual input."""
         with patch("sys.stdin.isatty", return_value=False):
             with patch("sys.stdin.read", return_value='{"test": "data"}'):
                 # This would be processed in main()
-                stdin_input = sys.stdin.read().strip()
+                stdin_input = read_stdin()
                 assert stdin_input == '{"test": "data"}'
 
+    @pytest.mark.parametrize(
+        "data, close_writer, expected",
+        [(b"", True, True), (b"5 3\n", True, False), (b"", False, False)],
+        ids=["closed_empty", "has_data", "writer_open"],
+    )
+    def test_stdin_at_eof(self, monkeypatch, data, close_writer, expected):
+        """Test that only an empty pipe with no writer counts as EOF."""
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, data)
+        if close_writer:
+            os.close(write_fd)
+        with open(read_fd) as stdin:
+            monkeypatch.setattr(sys, "stdin", stdin)
+            try:
+                assert stdin_at_eof() is expected
+                if close_writer:
+                    # Peeking must not consume the input
+                    assert read_stdin() == data.decode().strip()
+            finally:
+                if not close_writer:
+                    os.close(write_fd)
+
+    def test_stdin_at_eof_without_descriptor(self, monkeypatch):
+        """Test that in-memory stdin is never reported as EOF up front."""
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"")))
+        assert not stdin_at_eof()
+
+    def test_empty_stdin_rejected_before_connecting(
+        self, runner, run_mock, monkeypatch
+    ):
+        """Test that stdin already at EOF exits before the server is started."""
+        monkeypatch.setattr("mcpie_cli.mcpie.stdin_at_eof", lambda: True)
+        result = runner.invoke(main, ["test_server", "--stdin", *COMMAND])
+
+        assert result.exit_code == 3
+        assert STDIN_REQUIRED_MESSAGE in result.output
+        run_mock.assert_not_called()
+
+    def test_stdin_read_while_connecting(self, monkeypatch):
+        """Test that stdin is read alongside the server connection."""
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b' {"a": 5}\n')))
+        session = Mock()
+        session.connect = AsyncMock()
+
+        stdin_input = asyncio.run(connect_reading_stdin(session, False))
+
+        assert stdin_input == '{"a": 5}'
+        session.connect.assert_awaited_once()
+
+    def test_empty_stdin_reported_before_connect_failure(self, monkeypatch):
+        """Test that empty stdin takes priority over a failed connection."""
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"  \n")))
+        session = Mock()
+        session.connect = AsyncMock(side_effect=RuntimeError("connect failed"))
+
+        with pytest.raises(SystemExit) as exc_info:
+            asyncio.run(connect_reading_stdin(session, True))
+        assert exc_info.value.code == 3
+
+    def test_empty_stdin_reported_after_connecting(self, monkeypatch):
+        """Test that empty stdin is rejected once the server has connected."""
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"")))
+        session = Mock()
+        session.connect = AsyncMock()
+
+        with pytest.raises(SystemExit) as exc_info:
+            asyncio.run(connect_reading_stdin(session, True))
+        assert exc_info.value.code == 3
+        session.connect.assert_awaited_once()
+
+    def test_interrupt_does_not_wait_for_stdin(self, monkeypatch):
+        """Test that an interrupted connect returns while stdin is still open."""
+        read_fd, write_fd = os.pipe()
+        stdin = open(read_fd)
+        monkeypatch.setattr(sys, "stdin", stdin)
+        session = Mock()
+        session.connect = AsyncMock(side_effect=KeyboardInterrupt)
+
+        try:
+            with pytest.raises(KeyboardInterrupt):
+                asyncio.run(connect_reading_stdin(session, True))
+        finally:
+            # Let the abandoned reader hit EOF; close() waits for its read
+            os.close(write_fd)
+            stdin.close()
+
 
 class TestMetadataParsing:
     """Test metadata parsing for env and header options."""
 
     def test_env_parsing(self):
         """Test environment variable parsing."""
-        env_items = ("KEY1:value1", "KEY2:value2")
-        header_items = ()
-
-        # Simulate the logic from main()
-        metadata = {}
-        for item in env_items + header_items:
-            if ":" in item:
-                key, value = item.split(":", 1)
-                metadata[key] = value
+        metadata = parse_key_value_pairs(("KEY1:value1", "KEY2:value2"))
 
         assert metadata == {"KEY1": "value1", "KEY2": "value2"}
 
     def test_header_parsing(self):
         """Test header parsing."""
-        env_items = ()
-        header_items = ("Authorization:Bearer token", "Content-Type:application/json")
-
-        # Simulate the logic from main()
-        metadata = {}
-        for item in env_items + header_items:
-            if ":" in item:
-                key, value = item.split(":", 1)
-                metadata[key] = value
+        metadata = parse_key_value_pairs(
+            ("Authorization:Bearer token", "Content-Type:application/json")
+        )
 
         assert metadata == {
             "Authorization": "Bearer token",
@@ -240,43 +292,55 @@ class TestMetadataParsing:
         env_items = ("API_KEY:secret",)
         header_items = ("Authorization:Bearer token",)
 
-        # Simulate the logic from main()
-        metadata = {}
-        for item in env_items + header_items:
-            if ":" in item:
-                key, value = item.split(":", 1)
-                metadata[key] = value
+        metadata = parse_key_value_pairs(env_items + header_items)
 
         assert metadata == {"API_KEY": "secret", "Authorization": "Bearer token"}
 
+    def test_value_containing_colon(self):
+        """Test that only the first colon separates key and value."""
+        metadata = parse_key_value_pairs(("URL:http://localhost:8000",))
+
+        assert metadata == {"URL": "http://localhost:8000"}
+
+    def test_item_without_colon_is_skipped(self):
+        """Test that items without a separator are ignored."""
+        metadata = parse_key_value_pairs(("NOSEPARATOR", "KEY:value"))
+
+        assert metadata == {"KEY": "value"}
+
 
 class TestCLIValidation:
     """Test CLI argument validation."""
 
-    def test_invalid_output_format(self):
+    def test_invalid_output_format(self, runner, run_mock):
         """Test invalid output format."""
-        runner = CliRunner()
-        with patch("mcpie_cli.mcpie.asyncio.run"):
-            result = runner.invoke(
-                main,
-                [
-                    "test_server",
-                    "--output",
-                    "invalid_format",
-                    "--",
-                    "t",
-                    "call",
-                    "test",
-                ],
-            )
-
-            # Should fail with invalid choice
-            assert result.exit_code != 0
-            assert "Invalid value for '--output'" in result.output
-
-    def test_required_server_argument(self):
+        result = runner.invoke(
+            main,
+            [
+                "test_server",
+                "--output",
+                "invalid_format",
+                "--",
+                "t",
+                "call",
+                "test",
+            ],
+        )
+
+        # Should fail with invalid choice before any session is started
+        assert result.exit_code != 0
+        assert "Invalid value for '--output'" in result.output
+        run_mock.assert_not_called()
+
+    def test_valid_invocation_runs_once(self, runner, run_mock):
+        """Test a valid invocation hands exactly one coroutine to asyncio.run."""
+        result = runner.invoke(main, ["test_server", *COMMAND])
+
+        assert result.exit_code == 0
+        run_mock.assert_called_once()
+
+    def test_required_server_argument(self, runner):
         """Test that server argument is required."""
-        runner = CliRunner()
         result = runner.invoke(main, [])
 
         # Should fail without server argument
@@ -297,37 +361,29 @@ class TestCLIValidation:
 class TestExitCodeFunction:
     """Test the exit_with_code function."""
 
-    def test_exit_with_success(self):
+    def test_exit_with_success(self, capsys, exit_calls):
         """Test exit with success code."""
-        with patch("sys.exit") as mock_exit:
-            with patch("builtins.print") as mock_print:
-                exit_with_code(0, "Success message", False)
-                mock_print.assert_called_once_with("Success message")
-                mock_exit.assert_called_once_with(0)
+        exit_with_code(0, "Success message", False)
+        assert capsys.readouterr().out == "Success message\n"
+        assert exit_calls == [0]
 
-    def test_exit_with_error(self):
+    def test_exit_with_error(self, capsys, exit_calls):
         """Test exit with error code."""
-        with patch("sys.exit") as mock_exit:
-            with patch("builtins.print") as mock_print:
-                exit_with_code(1, "Error message", False)
-                mock_print.assert_called_once_with("Error message", file=sys.stderr)
-                mock_exit.assert_called_once_with(1)
+        exit_with_code(1, "Error message", False)
+        assert capsys.readouterr().err == "Error message\n"
+        assert exit_calls == [1]
 
-    def test_exit_with_quiet_mode(self):
+    def test_exit_with_quiet_mode(self, capsys, exit_calls):
         """Test exit with quiet mode."""
-        with patch("sys.exit") as mock_exit:
-            with patch("builtins.print") as mock_print:
-                exit_with_code(1, "Error message", True)
-                mock_print.assert_not_called()
-                mock_exit.assert_called_once_with(1)
+        exit_with_code(1, "Error message", True)
+        assert capsys.readouterr() == ("", "")
+        assert exit_calls == [1]
 
-    def test_exit_without_message(self):
+    def test_exit_without_message(self, capsys, exit_calls):
         """Test exit without message."""
-        with patch("sys.exit") as mock_exit:
-            with patch("builtins.print") as mock_print:
-                exit_with_code(1, "", False)
-                mock_print.assert_not_called()
-                mock_exit.assert_called_once_with(1)
+        exit_with_code(1, "", False)
+        assert capsys.readouterr() == ("", "")
+        assert exit_calls == [1]
 
 
 class TestOutputFormatChoices:
@@ -335,9 +391,7 @@ class TestOutputFormatChoices:
 
     def test_valid_output_formats(self):
         """Test all valid output formats."""
-        valid_formats = ["json", "pretty", "table", "yaml", "raw"]
-
-        for format_name in valid_formats:
+        for format_name in OUTPUT_FORMATS:
             config = OutputConfig(format_name, False, False, None)
             assert config.output_format == format_name
 
@@ -349,3 +403,9 @@ class TestOutputFormatChoices:
         assert config.output_format == "json"
 
         # "JSON" would be invalid (not tested here as it would fail at CLI level)
+
+    def test_output_option_uses_shared_choice(self):
+        """Test that --output validates against the module-level choice."""
+        option = next(p for p in main.params if p.name == "output")
+        assert option.type is OUTPUT_FORMAT_CHOICE
+        assert tuple(option.type.choices) == OUTPUT_FORMATS
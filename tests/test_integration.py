@@ -2,489 +2,269 @@
 Integration tests for the complete CLI functionality.
 """
 
-from unittest.mock import Mock, patch, AsyncMock
-from click.testing import CliRunner
-import tempfile
-import os
-import json
+from json import JSONDecodeError
 
-from mcpie_cli.mcpie import main
+import pytest
+
+from mcpie_cli.mcpie import (
+    EXIT_CLI_ERROR,
+    EXIT_INVALID_INPUT,
+    EXIT_SERVER_ERROR,
+    main,
+)
+
+
+# Click argv tuples shared by the tests; CliRunner.invoke accepts any sequence
+SERVER = "test_server"
+COMMAND = ("--", "t", "call", "test")
 
 
 class TestCLIIntegration:
     """Integration tests for the complete CLI."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.runner = CliRunner()
-
-    def test_json_output_format_integration(self):
-        """Test JSON output format end-to-end."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main, ["test_server", "--output", "json", "--", "t", "call", "test"]
-                )
-
-                # Should have created MCPSession with json output config
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.output_format == "json"
-
-    def test_quiet_mode_integration(self):
-        """Test quiet mode end-to-end."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main, ["test_server", "--quiet", "--", "t", "call", "test"]
-                )
-
-                # Should have created MCPSession with quiet=True
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.quiet is True
-
-    def test_output_file_integration(self):
+    @pytest.mark.parametrize(
+        "argv, expected",
+        [
+            ((SERVER, "--output", "json", *COMMAND), {"output_format": "json"}),
+            ((SERVER, "--quiet", *COMMAND), {"quiet": True}),
+            ((SERVER, "--verbose", *COMMAND), {"verbose": True}),
+            (
+                (SERVER, "--output", "yaml", "--quiet", "--verbose", *COMMAND),
+                {"output_format": "yaml", "quiet": True, "verbose": True},
+            ),
+            # Interactive mode defaults to pretty output
+            ((SERVER,), {"output_format": "pretty"}),
+            # Command mode keeps JSON as the default output
+            ((SERVER, *COMMAND), {"output_format": "json"}),
+        ],
+        ids=["json", "quiet", "verbose", "multiple", "interactive", "command"],
+    )
+    def test_output_config(self, runner, mcp_mocks, argv, expected):
+        """Test CLI options end up in the session's output config."""
+        runner.invoke(main, argv)
+
+        call_args = mcp_mocks.session_class.call_args
+        assert mcp_mocks.session_class.call_count == 1
+        output_config = call_args.kwargs["output_config"]
+        for attr, value in expected.items():
+            assert getattr(output_config, attr) == value
+
+    def test_output_file_integration(self, runner, mcp_mocks, tmp_path):
         """Test output file functionality end-to-end."""
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp_path = tmp.name
-
-        try:
-            with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-                mock_session = Mock()
-                mock_session.connect = AsyncMock()
-                mock_session.disconnect = AsyncMock()
-                mock_session_class.return_value = mock_session
-
-                with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                    mock_run_commands.return_value = None
-
-                    self.runner.invoke(
-                        main, ["test_server", "-o", tmp_path, "--", "t", "call", "test"]
-                    )
-
-                    # Should have created MCPSession with output file
-                    mock_session_class.assert_called_once()
-                    call_args = mock_session_class.call_args
-                    output_config = call_args[1]["output_config"]
-                    assert output_config.output_file == tmp_path
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
-    def test_stdin_integration(self):
+        output_file = str(tmp_path / "out.txt")
+
+        runner.invoke(main, (SERVER, "-o", output_file, *COMMAND))
+
+        # Should have created MCPSession with output file
+        call_args = mcp_mocks.session_class.call_args
+        assert mcp_mocks.session_class.call_count == 1
+        output_config = call_args.kwargs["output_config"]
+        assert output_config.output_file == output_file
+
+    def test_stdin_integration(self, runner, mcp_mocks):
         """Test stdin functionality end-to-end."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main,
-                    ["test_server", "--stdin", "--", "t", "call", "test"],
-                    input='{"test": "data"}',
-                )
-
-                # Should have called run_commands with stdin input
-                mock_run_commands.assert_called_once()
-                call_args = mock_run_commands.call_args[0]
-                stdin_input = call_args[2] if len(call_args) > 2 else None
-                assert stdin_input == '{"test": "data"}'
-
-    def test_verbose_mode_integration(self):
-        """Test verbose mode end-to-end."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main, ["test_server", "--verbose", "--", "t", "call", "test"]
-                )
-
-                # Should have created MCPSession with verbose=True
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.verbose is True
-
-    def test_multiple_options_integration(self):
-        """Test multiple options working together."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main,
-                    [
-                        "test_server",
-                        "--output",
-                        "yaml",
-                        "--quiet",
-                        "--verbose",
-                        "--",
-                        "t",
-                        "call",
-                        "test",
-                    ],
-                )
-
-                # Should have created MCPSession with all options
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.output_format == "yaml"
-                assert output_config.quiet is True
-                assert output_config.verbose is True
-
-    def test_env_and_header_parsing_integration(self):
+        runner.invoke(
+            main,
+            (SERVER, "--stdin", *COMMAND),
+            input='{"test": "data"}',
+        )
+
+        # Should have called run_commands with stdin input
+        call_args = mcp_mocks.run_commands.call_args
+        assert mcp_mocks.run_commands.call_count == 1
+        stdin_input = call_args.args[2] if len(call_args.args) > 2 else None
+        assert stdin_input == '{"test": "data"}'
+
+    def test_env_and_header_parsing_integration(self, runner, mcp_mocks):
         """Test environment and header parsing end-to-end."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main,
-                    [
-                        "test_server",
-                        "-e",
-                        "API_KEY:secret",
-                        "-H",
-                        "Authorization:Bearer token",
-                        "--",
-                        "t",
-                        "call",
-                        "test",
-                    ],
-                )
-
-                # Should have created MCPSession with metadata
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                metadata = call_args[0][1]  # Second positional argument
-                assert metadata == {
-                    "API_KEY": "secret",
-                    "Authorization": "Bearer token",
-                }
-
-    def test_interactive_mode_default_output(self):
-        """Test that interactive mode defaults to pretty output."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_repl") as mock_run_repl:
-                mock_run_repl.return_value = None
-
-                self.runner.invoke(main, ["test_server"])
-
-                # Should have created MCPSession with pretty output for interactive mode
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.output_format == "pretty"
-
-    def test_command_mode_keeps_json_output(self):
-        """Test that command mode keeps JSON as default output."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(main, ["test_server", "--", "t", "call", "test"])
-
-                # Should have created MCPSession with json output for command mode
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.output_format == "json"
+        runner.invoke(
+            main,
+            (
+                SERVER,
+                "-e",
+                "API_KEY:secret",
+                "-H",
+                "Authorization:Bearer token",
+                *COMMAND,
+            ),
+        )
+
+        # Should have created MCPSession with metadata
+        call_args = mcp_mocks.session_class.call_args
+        assert mcp_mocks.session_class.call_count == 1
+        metadata = call_args.args[1]  # Second positional argument
+        assert metadata == {
+            "API_KEY": "secret",
+            "Authorization": "Bearer token",
+        }
+
+
+def _output_bytes(result):
+    """Return a CliRunner result's stdout and stderr bytes together.
+
+    Result.output_bytes needs Click 8.2. Older versions mix stderr into
+    stdout_bytes and leave stderr_bytes as None.
+    """
+    return result.stdout_bytes + (result.stderr_bytes or b"")
 
 
 class TestErrorHandlingIntegration:
     """Integration tests for error handling."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.runner = CliRunner()
-
-    def test_invalid_output_format_error(self):
+    def test_invalid_output_format_error(self, runner):
         """Test invalid output format produces proper error."""
-        result = self.runner.invoke(
-            main, ["test_server", "--output", "invalid", "--", "t", "call", "test"]
-        )
+        result = runner.invoke(main, (SERVER, "--output", "invalid", *COMMAND))
 
         assert result.exit_code != 0
-        assert "Invalid value for '--output'" in result.output
+        assert b"Invalid value for '--output'" in _output_bytes(result)
 
-    def test_missing_server_argument_error(self):
+    def test_missing_server_argument_error(self, runner):
         """Test missing server argument produces proper error."""
-        result = self.runner.invoke(main, [])
+        result = runner.invoke(main, ())
 
         assert result.exit_code != 0
-        assert "Missing argument" in result.output or "Usage:" in result.output
+        output = _output_bytes(result)
+        assert b"Missing argument" in output or b"Usage:" in output
 
-    def test_stdin_without_input_error(self):
+    def test_stdin_without_input_error(self, runner, mcp_mocks):
         """Test --stdin without input produces proper error."""
-        result = self.runner.invoke(
-            main, ["test_server", "--stdin", "--", "t", "call", "test"]
-        )
+        result = runner.invoke(main, (SERVER, "--stdin", *COMMAND))
 
         # Should exit with invalid input code
-        assert result.exit_code == 3  # EXIT_INVALID_INPUT
+        assert result.exit_code == EXIT_INVALID_INPUT
         assert "Error: --stdin flag requires input from stdin" in result.output
 
-    def test_keyboard_interrupt_handling(self):
-        """Test keyboard interrupt handling."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            mock_run.side_effect = KeyboardInterrupt()
+    @pytest.mark.parametrize(
+        "exc, expected_code",
+        [
+            (KeyboardInterrupt(), EXIT_CLI_ERROR),
+            (JSONDecodeError("Invalid JSON", "", 0), EXIT_INVALID_INPUT),
+            (Exception("MCP server connection failed"), EXIT_SERVER_ERROR),
+            (Exception("Generic error"), EXIT_CLI_ERROR),
+        ],
+        ids=["keyboard_interrupt", "json_decode", "server", "generic"],
+    )
+    def test_error_handling(self, runner, run_mock, exit_mock, exc, expected_code):
+        """Test errors raised while running map to the right exit code."""
+        run_mock.side_effect = exc
 
-            with patch("mcpie_cli.mcpie.exit_with_code") as mock_exit:
-                self.runner.invoke(main, ["test_server", "--", "t", "call", "test"])
+        runner.invoke(main, (SERVER, *COMMAND))
 
-                # Should have called exit_with_code with CLI error code
-                mock_exit.assert_called_once()
-                args = mock_exit.call_args[0]
-                assert args[0] == 1  # EXIT_CLI_ERROR
+        call_args = exit_mock.call_args
+        assert exit_mock.call_count == 1
+        assert call_args.args[0] == expected_code
 
-    def test_json_decode_error_handling(self):
-        """Test JSON decode error handling."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            mock_run.side_effect = json.JSONDecodeError("Invalid JSON", "", 0)
 
-            with patch("mcpie_cli.mcpie.exit_with_code") as mock_exit:
-                self.runner.invoke(main, ["test_server", "--", "t", "call", "test"])
+class TestOutputFormatterIntegration:
+    """Integration tests for output formatter usage."""
 
-                # Should have called exit_with_code with invalid input code
-                mock_exit.assert_called_once()
-                args = mock_exit.call_args[0]
-                assert args[0] == 3  # EXIT_INVALID_INPUT
+    def test_output_formatter_creation(self, runner, mcp_mocks):
+        """Test that output formatter is created correctly."""
+        runner.invoke(main, (SERVER, "--output", "yaml", *COMMAND))
+
+        # Should have created MCPSession with output formatter
+        call_args = mcp_mocks.session_class.call_args
+        assert mcp_mocks.session_class.call_count == 1
+        output_config = call_args.kwargs["output_config"]
+        assert output_config is not None
+        assert output_config.output_format == "yaml"
 
-    def test_server_error_handling(self):
-        """Test server error handling."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            mock_run.side_effect = Exception("MCP server connection failed")
+    def test_file_output_configuration(self, runner, mcp_mocks, tmp_path):
+        """Test file output configuration."""
+        output_file = str(tmp_path / "out.json")
 
-            with patch("mcpie_cli.mcpie.exit_with_code") as mock_exit:
-                self.runner.invoke(main, ["test_server", "--", "t", "call", "test"])
+        runner.invoke(
+            main,
+            (SERVER, "--output", "json", "-o", output_file, *COMMAND),
+        )
 
-                # Should have called exit_with_code with server error code
-                mock_exit.assert_called_once()
-                args = mock_exit.call_args[0]
-                assert args[0] == 2  # EXIT_SERVER_ERROR
+        # Should have created MCPSession with file output
+        call_args = mcp_mocks.session_class.call_args
+        assert mcp_mocks.session_class.call_count == 1
+        output_config = call_args.kwargs["output_config"]
+        assert output_config.output_file == output_file
 
-    def test_generic_error_handling(self):
-        """Test generic error handling."""
-        with patch("mcpie_cli.mcpie.asyncio.run") as mock_run:
-            mock_run.side_effect = Exception("Generic error")
 
-            with patch("mcpie_cli.mcpie.exit_with_code") as mock_exit:
-                self.runner.invoke(main, ["test_server", "--", "t", "call", "test"])
+def _assert_lifecycle(session, run_count):
+    """Assert the session connected, ran once, and disconnected."""
+    session.connect.assert_called_once()
+    assert run_count == 1
+    session.disconnect.assert_called_once()
 
-                # Should have called exit_with_code with CLI error code
-                mock_exit.assert_called_once()
-                args = mock_exit.call_args[0]
-                assert args[0] == 1  # EXIT_CLI_ERROR
 
+def _run_without_loop(coro):
+    """Drive a coroutine that never suspends, skipping event loop setup."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("coroutine suspended; it needs a real event loop")
 
-class TestOutputFormatterIntegration:
-    """Integration tests for output formatter usage."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.runner = CliRunner()
+@pytest.fixture
+def no_event_loop(request, monkeypatch):
+    """Run main's coroutine without an event loop; the session is mocked.
 
-    def test_output_formatter_creation(self):
-        """Test that output formatter is created correctly."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main, ["test_server", "--output", "yaml", "--", "t", "call", "test"]
-                )
-
-                # Should have created MCPSession with output formatter
-                mock_session_class.assert_called_once()
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config is not None
-                assert output_config.output_format == "yaml"
-
-    def test_file_output_configuration(self):
-        """Test file output configuration."""
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp_path = tmp.name
-
-        try:
-            with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-                mock_session = Mock()
-                mock_session.connect = AsyncMock()
-                mock_session.disconnect = AsyncMock()
-                mock_session_class.return_value = mock_session
-
-                with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                    mock_run_commands.return_value = None
-
-                    self.runner.invoke(
-                        main,
-                        [
-                            "test_server",
-                            "--output",
-                            "json",
-                            "-o",
-                            tmp_path,
-                            "--",
-                            "t",
-                            "call",
-                            "test",
-                        ],
-                    )
-
-                    # Should have created MCPSession with file output
-                    mock_session_class.assert_called_once()
-                    call_args = mock_session_class.call_args
-                    output_config = call_args[1]["output_config"]
-                    assert output_config.output_file == tmp_path
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+    Cases marked real_event_loop keep asyncio.run, e.g. for --stdin, whose
+    reader hands its result back through the running loop.
+    """
+    if request.node.get_closest_marker("real_event_loop"):
+        return
+    monkeypatch.setattr("mcpie_cli.mcpie.asyncio.run", _run_without_loop)
 
 
 class TestCLIWorkflow:
     """Integration tests for complete CLI workflows."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.runner = CliRunner()
-
-    def test_complete_tool_call_workflow(self):
-        """Test complete tool call workflow."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main,
-                    [
-                        "test_server",
-                        "--output",
-                        "json",
-                        "--quiet",
-                        "--",
-                        "t",
-                        "call",
-                        "add",
-                        "5",
-                        "3",
-                    ],
-                )
-
-                # Should have gone through complete workflow
-                mock_session.connect.assert_called_once()
-                mock_run_commands.assert_called_once()
-                mock_session.disconnect.assert_called_once()
-
-    def test_complete_stdin_workflow(self):
-        """Test complete stdin workflow."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_commands") as mock_run_commands:
-                mock_run_commands.return_value = None
-
-                self.runner.invoke(
-                    main,
-                    [
-                        "test_server",
-                        "--stdin",
-                        "--output",
-                        "raw",
-                        "--",
-                        "t",
-                        "call",
-                        "add",
-                    ],
-                    input='{"a": 5, "b": 3}',
-                )
-
-                # Should have processed stdin input
-                mock_run_commands.assert_called_once()
-                args = mock_run_commands.call_args[0]
-                stdin_input = args[2] if len(args) > 2 else None
-                assert stdin_input == '{"a": 5, "b": 3}'
-
-    def test_complete_interactive_workflow(self):
+    @pytest.mark.parametrize(
+        "argv, stdin, expected_stdin",
+        [
+            pytest.param(
+                (
+                    SERVER,
+                    "--output",
+                    "json",
+                    "--quiet",
+                    "--",
+                    "t",
+                    "call",
+                    "add",
+                    "5",
+                    "3",
+                ),
+                None,
+                None,
+                id="tool_call",
+            ),
+            pytest.param(
+                (SERVER, "--stdin", "--output", "raw", "--", "t", "call", "add"),
+                '{"a": 5, "b": 3}',
+                '{"a": 5, "b": 3}',
+                id="stdin",
+                marks=pytest.mark.real_event_loop,
+            ),
+        ],
+    )
+    def test_complete_command_workflow(
+        self, runner, mcp_mocks, no_event_loop, argv, stdin, expected_stdin
+    ):
+        """Test complete tool call workflow, with and without stdin."""
+        runner.invoke(main, argv, input=stdin)
+
+        # Should have gone through complete workflow
+        _assert_lifecycle(mcp_mocks.session, mcp_mocks.run_commands.call_count)
+        call_args = mcp_mocks.run_commands.call_args
+        assert call_args.args[2] == expected_stdin
+
+    def test_complete_interactive_workflow(self, runner, mcp_mocks, no_event_loop):
         """Test complete interactive workflow."""
-        with patch("mcpie_cli.mcpie.MCPSession") as mock_session_class:
-            mock_session = Mock()
-            mock_session.connect = AsyncMock()
-            mock_session.disconnect = AsyncMock()
-            mock_session_class.return_value = mock_session
-
-            with patch("mcpie_cli.mcpie.run_repl") as mock_run_repl:
-                mock_run_repl.return_value = None
-
-                self.runner.invoke(main, ["test_server"])
-
-                # Should have gone through interactive workflow
-                mock_session.connect.assert_called_once()
-                mock_run_repl.assert_called_once()
-                mock_session.disconnect.assert_called_once()
-
-                # Should have configured for interactive mode
-                call_args = mock_session_class.call_args
-                output_config = call_args[1]["output_config"]
-                assert output_config.output_format == "pretty"
+        runner.invoke(main, (SERVER,))
+
+        # Should have gone through interactive workflow
+        _assert_lifecycle(mcp_mocks.session, len(mcp_mocks.repl_calls))
+
+        # Should have configured for interactive mode
+        call_args = mcp_mocks.session_class.call_args
+        output_config = call_args.kwargs["output_config"]
+        assert output_config.output_format == "pretty"
@@ -2,20 +2,28 @@
 Tests for output formatters.
 """
 
+import asyncio
+import io
 import json
-import tempfile
 from unittest.mock import Mock, patch
 
+import orjson
+import pytest
+
 from mcpie_cli.mcpie import (
+    OUTPUT_FILE_BUFFER_SIZE,
+    OUTPUT_FORMATS,
+    OUTPUT_FORMATTERS,
+    MCPSession,
     OutputConfig,
     JsonOutputFormatter,
     PrettyOutputFormatter,
     TableOutputFormatter,
     YamlOutputFormatter,
     RawOutputFormatter,
+    dump_item,
     get_output_formatter,
 )
-from mcp.types import Result
 
 
 class TestOutputConfig:
@@ -42,36 +50,33 @@ class TestOutputConfig:
         assert config.quiet is True
 
 
+@pytest.mark.parametrize("formatter", ["json"], indirect=True, scope="class")
 class TestJsonOutputFormatter:
     """Test the JsonOutputFormatter class."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.config = OutputConfig("json", False, False, None)
-        self.formatter = JsonOutputFormatter(self.config)
-
-    def test_format_empty_result(self):
+    def test_format_empty_result(self, formatter):
         """Test formatting empty result."""
-        result = self.formatter.format_result(None)
+        result = formatter.format_result(None)
         assert result == "{}"
 
-    def test_format_simple_result(self):
+    def test_format_simple_result(self, formatter, result_mock):
         """Test formatting a simple result."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {
+        result_mock.model_dump.return_value = {
             "content": [{"type": "text", "text": "test"}]
         }
 
-        result = self.formatter.format_result(mock_result)
-        expected = json.dumps({"content": [{"type": "text", "text": "test"}]})
+        result = formatter.format_result(result_mock)
+        expected = orjson.dumps(
+            {"content": [{"type": "text", "text": "test"}]}
+        ).decode()
         assert result == expected
 
-    def test_format_empty_list(self):
+    def test_format_empty_list(self, formatter):
         """Test formatting empty list."""
-        result = self.formatter.format_list([], "Test", ["name"])
+        result = formatter.format_list([], "Test", ["name"])
         assert result == "[]"
 
-    def test_format_list_with_items(self):
+    def test_format_list_with_items(self, formatter):
         """Test formatting list with items."""
         items = [
             Mock(name="item1", description="desc1"),
@@ -80,81 +85,72 @@ class TestJsonOutputFormatter:
         items[0].model_dump.return_value = {"name": "item1", "description": "desc1"}
         items[1].model_dump.return_value = {"name": "item2", "description": "desc2"}
 
-        result = self.formatter.format_list(items, "Test", ["name", "description"])
-        expected = json.dumps(
+        result = formatter.format_list(items, "Test", ["name", "description"])
+        expected = orjson.dumps(
             [
                 {"name": "item1", "description": "desc1"},
                 {"name": "item2", "description": "desc2"},
             ]
-        )
+        ).decode()
         assert result == expected
 
-    def test_format_list_with_dicts(self):
+    def test_format_list_with_dicts(self, formatter):
         """Test formatting list with dict items."""
         items = [
             {"name": "item1", "description": "desc1"},
             {"name": "item2", "description": "desc2"},
         ]
 
-        result = self.formatter.format_list(items, "Test", ["name", "description"])
-        expected = json.dumps(
+        result = formatter.format_list(items, "Test", ["name", "description"])
+        expected = orjson.dumps(
             [
                 {"name": "item1", "description": "desc1"},
                 {"name": "item2", "description": "desc2"},
             ]
-        )
+        ).decode()
         assert result == expected
 
 
+@pytest.mark.parametrize("formatter", ["pretty"], indirect=True, scope="class")
 class TestPrettyOutputFormatter:
     """Test the PrettyOutputFormatter class."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.config = OutputConfig("pretty", False, False, None)
-        self.formatter = PrettyOutputFormatter(self.config)
-
-    def test_format_pretty_result(self):
+    def test_format_pretty_result(self, formatter, result_mock):
         """Test formatting with pretty indentation."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {
+        result_mock.model_dump.return_value = {
             "content": [{"type": "text", "text": "test"}]
         }
 
-        result = self.formatter.format_result(mock_result)
+        result = formatter.format_result(result_mock)
         expected = json.dumps({"content": [{"type": "text", "text": "test"}]}, indent=2)
         assert result == expected
 
-    def test_format_pretty_list(self):
+    def test_format_pretty_list(self, formatter):
         """Test formatting list with pretty indentation."""
         items = [{"name": "item1", "description": "desc1"}]
 
-        result = self.formatter.format_list(items, "Test", ["name", "description"])
+        result = formatter.format_list(items, "Test", ["name", "description"])
         expected = json.dumps([{"name": "item1", "description": "desc1"}], indent=2)
         assert result == expected
 
 
+@pytest.mark.parametrize("formatter", ["table"], indirect=True, scope="class")
 class TestTableOutputFormatter:
     """Test the TableOutputFormatter class."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.config = OutputConfig("table", False, False, None)
-        self.formatter = TableOutputFormatter(self.config)
-
-    def test_format_empty_list(self):
+    def test_format_empty_list(self, formatter):
         """Test formatting empty list as table."""
-        result = self.formatter.format_list([], "Test", ["name"])
+        result = formatter.format_list([], "Test", ["name"])
         assert result == "No test available"
 
-    def test_format_simple_table(self):
+    def test_format_simple_table(self, formatter):
         """Test formatting simple table."""
         items = [
             {"name": "item1", "description": "desc1"},
             {"name": "item2", "description": "desc2"},
         ]
 
-        result = self.formatter.format_list(items, "Test", ["name", "description"])
+        result = formatter.format_list(items, "Test", ["name", "description"])
 
         # Check that result contains table-like structure
         lines = result.split("\n")
@@ -164,126 +160,192 @@ class TestTableOutputFormatter:
         assert "item1" in lines[2]
         assert "item2" in lines[3]
 
-    def test_format_result_as_key_value(self):
+    def test_format_result_as_key_value(self, formatter, result_mock):
         """Test formatting single result as key-value pairs."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {"key1": "value1", "key2": "value2"}
+        result_mock.model_dump.return_value = {"key1": "value1", "key2": "value2"}
 
-        result = self.formatter.format_result(mock_result)
+        result = formatter.format_result(result_mock)
         assert "key1: value1" in result
         assert "key2: value2" in result
 
 
+@pytest.mark.parametrize("formatter", ["yaml"], indirect=True, scope="class")
 class TestYamlOutputFormatter:
     """Test the YamlOutputFormatter class."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.config = OutputConfig("yaml", False, False, None)
-        self.formatter = YamlOutputFormatter(self.config)
-
-    def test_format_empty_result(self):
+    def test_format_empty_result(self, formatter):
         """Test formatting empty result as YAML."""
-        result = self.formatter.format_result(None)
+        result = formatter.format_result(None)
         assert result == "null"
 
-    def test_format_yaml_result(self):
+    def test_format_yaml_result(self, formatter, result_mock):
         """Test formatting result as YAML."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {
+        result_mock.model_dump.return_value = {
             "content": [{"type": "text", "text": "test"}]
         }
 
-        result = self.formatter.format_result(mock_result)
+        result = formatter.format_result(result_mock)
         assert "content:" in result
         assert "type: text" in result
         assert "text: test" in result
 
-    def test_format_yaml_list(self):
+    def test_format_yaml_list(self, formatter):
         """Test formatting list as YAML."""
         items = [{"name": "item1", "description": "desc1"}]
 
-        result = self.formatter.format_list(items, "Test", ["name", "description"])
+        result = formatter.format_list(items, "Test", ["name", "description"])
         assert "name: item1" in result
         assert "description: desc1" in result
 
 
+@pytest.mark.parametrize("formatter", ["raw"], indirect=True, scope="class")
 class TestRawOutputFormatter:
     """Test the RawOutputFormatter class."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.config = OutputConfig("raw", False, False, None)
-        self.formatter = RawOutputFormatter(self.config)
-
-    def test_format_empty_result(self):
+    def test_format_empty_result(self, formatter):
         """Test formatting empty result as raw."""
-        result = self.formatter.format_result(None)
+        result = formatter.format_result(None)
         assert result == ""
 
-    def test_format_text_content(self):
+    def test_format_text_content(self, formatter, result_mock):
         """Test extracting text content from result."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {
+        result_mock.model_dump.return_value = {
             "content": [{"type": "text", "text": "Hello World"}]
         }
 
-        result = self.formatter.format_result(mock_result)
+        result = formatter.format_result(result_mock)
         assert result == "Hello World"
 
-    def test_format_resource_content(self):
+    def test_format_resource_content(self, formatter, result_mock):
         """Test extracting resource content."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {"contents": [{"text": "Config data"}]}
+        result_mock.model_dump.return_value = {"contents": [{"text": "Config data"}]}
 
-        result = self.formatter.format_result(mock_result)
+        result = formatter.format_result(result_mock)
         assert result == "Config data"
 
-    def test_format_structured_content(self):
+    def test_format_structured_content(self, formatter, result_mock):
         """Test extracting structured content result."""
-        mock_result = Mock(spec=Result)
-        mock_result.model_dump.return_value = {"structuredContent": {"result": 42}}
+        result_mock.model_dump.return_value = {"structuredContent": {"result": 42}}
 
-        result = self.formatter.format_result(mock_result)
+        result = formatter.format_result(result_mock)
         assert result == "42"
 
-    def test_format_raw_list(self):
+    def test_format_raw_list(self, formatter):
         """Test formatting list in raw mode."""
         items = [Mock(name="item1"), Mock(name="item2")]
         items[0].name = "item1"
         items[1].name = "item2"
 
-        result = self.formatter.format_list(items, "Test", ["name"])
+        result = formatter.format_list(items, "Test", ["name"])
         assert result == "item1\nitem2"
 
-    def test_format_raw_list_with_dicts(self):
+    def test_format_raw_list_with_dicts(self, formatter):
         """Test formatting list of dicts in raw mode."""
         items = [{"name": "item1"}, {"uri": "uri2"}]
 
-        result = self.formatter.format_list(items, "Test", ["name", "uri"])
+        result = formatter.format_list(items, "Test", ["name", "uri"])
         assert result == "item1\nuri2"
 
 
+class TestJsonEncodingFallback:
+    """Test JSON output for data orjson cannot encode faithfully."""
+
+    @pytest.mark.parametrize(
+        "data, compact",
+        [
+            ({"n": 2**70}, '{"n":1180591620717411303424}'),
+            ({1: "a"}, '{"1":"a"}'),
+            ({"f": float("nan"), "g": None}, '{"f":NaN,"g":null}'),
+            ({"s": "h\u00e9llo \U0001f600"}, '{"s":"h\\u00e9llo \\ud83d\\ude00"}'),
+        ],
+        ids=["big_int", "non_str_key", "nan", "non_ascii"],
+    )
+    def test_json_and_pretty_match_stdlib(self, data, compact):
+        """Test big ints, non-str keys, NaN and non-ASCII text encode like json.dumps."""
+        json_formatter = JsonOutputFormatter(OutputConfig("json", False, False, None))
+        pretty_formatter = PrettyOutputFormatter(
+            OutputConfig("pretty", False, False, None)
+        )
+
+        assert json_formatter.format_list([data], "Test", []) == f"[{compact}]"
+        assert pretty_formatter.format_list([data], "Test", []) == json.dumps(
+            [data], indent=2
+        )
+
+
+class TestDumpItem:
+    """Test the dump_item helper shared by the formatters."""
+
+    def test_dict_passes_through(self):
+        """Test dicts are returned as-is."""
+        item = {"name": "item1"}
+        assert dump_item(item) is item
+
+    def test_model_dump_called_once(self, result_mock):
+        """Test models are dumped exactly once, without defaults."""
+        result_mock.model_dump.return_value = {"test": "data"}
+
+        assert dump_item(result_mock) == {"test": "data"}
+        result_mock.model_dump.assert_called_once_with(exclude_defaults=True)
+
+    def test_plain_object_uses_columns(self):
+        """Test other objects are reduced to the requested columns."""
+        item = Mock(spec=["name"])
+        item.name = "item1"
+
+        assert dump_item(item, ["name", "uri"]) == {"name": "item1"}
+
+
 class TestFileOutput:
     """Test file output functionality."""
 
-    def test_file_output_writing(self):
+    def test_file_output_writing(self, monkeypatch, result_mock):
         """Test writing output to file."""
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as tmp:
-            config = OutputConfig("json", False, False, tmp.name)
-            formatter = JsonOutputFormatter(config)
+        buf = io.BytesIO()
+        opened = []
 
-            mock_result = Mock(spec=Result)
-            mock_result.model_dump.return_value = {"test": "data"}
+        def fake_open(*args, **kwargs):
+            opened.append((args, kwargs))
+            return buf
 
-            output = formatter.format_result(mock_result)
-            formatter.write(output)
+        # Shadow the builtin for the mcpie module only; nothing touches disk
+        monkeypatch.setattr("mcpie_cli.mcpie.open", fake_open, raising=False)
+        config = OutputConfig("json", False, False, "output.json")
+        formatter = JsonOutputFormatter(config)
+
+        result_mock.model_dump.return_value = {"test": "data"}
 
-            # Read the file content
-            with open(tmp.name, "r") as f:
-                content = f.read()
+        output = formatter.format_result(result_mock)
+        formatter.write(output)
+
+        assert opened == [
+            (("output.json", "wb"), {"buffering": OUTPUT_FILE_BUFFER_SIZE})
+        ]
+        assert buf.getvalue() == b'{"test":"data"}'
 
-            assert content == '{"test": "data"}'
+    def test_file_output_encodes_utf8(self, monkeypatch):
+        """Test text written to the output file is encoded as UTF-8."""
+        buf = io.BytesIO()
+        monkeypatch.setattr("mcpie_cli.mcpie.open", lambda *a, **kw: buf, raising=False)
+        formatter = JsonOutputFormatter(OutputConfig("json", False, False, "out"))
+
+        formatter.write("héllo\n")
+
+        assert buf.getvalue() == "héllo\n".encode()
+
+    def test_disconnect_closes_output_file(self, tmp_path):
+        """Test that disconnecting the session flushes and closes the file."""
+        output_file = tmp_path / "out.json"
+        session = MCPSession(
+            "test_server",
+            output_config=OutputConfig("json", False, False, str(output_file)),
+        )
+        session.output_formatter.write('{"test":"data"}\n')
+
+        asyncio.run(session.disconnect())
+
+        assert session.output_formatter.output_stream.closed
+        assert output_file.read_text() == '{"test":"data"}\n'
 
 
 class TestGetOutputFormatter:
@@ -325,6 +387,10 @@ class TestGetOutputFormatter:
         formatter = get_output_formatter(config)
         assert isinstance(formatter, JsonOutputFormatter)
 
+    def test_every_output_format_has_a_formatter(self):
+        """Test each --output choice maps to its own formatter class."""
+        assert tuple(OUTPUT_FORMATTERS) == OUTPUT_FORMATS
+
 
 class TestErrorHandling:
     """Test error handling in formatters."""
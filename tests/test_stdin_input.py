@@ -2,199 +2,143 @@
 Tests for stdin input handling.
 """
 
+import asyncio
 import json
+import orjson
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock
 
-from mcpie_cli.mcpie import run_commands, MCPSession
+from mcpie_cli.mcpie import looks_like_json, run_commands
 
 
-class TestStdinInputHandling:
-    """Test stdin input handling in run_commands."""
-
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.mock_session = Mock(spec=MCPSession)
-        self.mock_session.output_formatter = None
-        self.mock_session.execute_command = AsyncMock()
+def _run(session, commands, stdin_input):
+    """Run run_commands to completion on a fresh event loop."""
+    return asyncio.run(run_commands(session, commands, stdin_input))
 
-    @pytest.mark.asyncio
-    async def test_stdin_json_input_for_tool_call(self):
-        """Test JSON input from stdin for tool call."""
-        stdin_input = '{"a": 5, "b": 3}'
-        commands = ("t", "call", "add")
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+@pytest.fixture
+def handle_calls(monkeypatch):
+    """Replace handle_command with a coroutine stub; returns its call args."""
+    calls = []
 
-            # Should call handle_command with the modified command string
-            mock_handle.assert_called_once()
-            args = mock_handle.call_args[0]
-            assert "add" in args[2]  # Command parts should contain the modified command
+    async def stub(*args):
+        calls.append(args)
 
-    @pytest.mark.asyncio
-    async def test_stdin_json_input_for_prompt_get(self):
-        """Test JSON input from stdin for prompt get."""
-        stdin_input = '{"name": "test_user"}'
-        commands = ("p", "get", "greeting")
-
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
-
-            mock_handle.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_stdin_json_input_for_resource_read(self):
-        """Test JSON input from stdin for resource read."""
-        stdin_input = '{"uri": "config://app"}'
-        commands = ("r", "read")
-
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
-
-            mock_handle.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_stdin_plain_text_input(self):
-        """Test plain text input from stdin."""
-        stdin_input = "hello world"
-        commands = ("r", "read")
-
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
-
-            mock_handle.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_stdin_input_no_command(self):
-        """Test stdin input with no command."""
-        stdin_input = '{"test": "data"}'
-        commands = ()
+    monkeypatch.setattr("mcpie_cli.mcpie.handle_command", stub)
+    return calls
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
 
-            mock_handle.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_stdin_invalid_json(self):
-        """Test invalid JSON input from stdin."""
-        stdin_input = '{"invalid": json}'
-        commands = ("r", "read")
-
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
-
-            mock_handle.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_stdin_json_with_uri_field(self):
-        """Test JSON input with uri field from stdin."""
-        stdin_input = '{"uri": "file:///test.txt"}'
-        commands = ("r", "read")
-
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
-
-            mock_handle.assert_called_once()
-            args = mock_handle.call_args[0]
-            assert args[0] == self.mock_session
-            assert (
-                "read" in args[2]
-            )  # Command parts should contain the modified command
-
-    @pytest.mark.asyncio
-    async def test_stdin_json_with_name_field(self):
-        """Test JSON input with name field from stdin."""
-        stdin_input = '{"name": "test_tool"}'
-        commands = ("r", "read")
+class TestStdinInputHandling:
+    """Test stdin input handling in run_commands."""
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+    @pytest.fixture(autouse=True)
+    def _session(self, session_mock):
+        """Set up test fixtures."""
+        self.mock_session = session_mock
+        self.mock_session.output_formatter = None
 
-            mock_handle.assert_called_once()
-            args = mock_handle.call_args[0]
-            assert args[0] == self.mock_session
-            assert (
-                "read" in args[2]
-            )  # Command parts should contain the modified command
+    @pytest.mark.parametrize(
+        "stdin_input, commands, expected_part",
+        [
+            ('{"a": 5, "b": 3}', ("t", "call", "add"), "add"),
+            ('{"name": "test_user"}', ("p", "get", "greeting"), "greeting"),
+            ('{"uri": "config://app"}', ("r", "read"), "read"),
+            ("hello world", ("r", "read"), "read"),
+            ('{"test": "data"}', (), None),
+            ('{"invalid": json}', ("r", "read"), "read"),
+            ('{"uri": "file:///test.txt"}', ("r", "read"), "read"),
+            ('{"name": "test_tool"}', ("r", "read"), "read"),
+        ],
+        ids=[
+            "tool_call",
+            "prompt_get",
+            "resource_read",
+            "plain_text",
+            "no_command",
+            "invalid_json",
+            "uri_field",
+            "name_field",
+        ],
+    )
+    def test_stdin_dispatch(self, handle_calls, stdin_input, commands, expected_part):
+        """Test stdin input is folded into a single handle_command call."""
+        _run(self.mock_session, commands, stdin_input)
+
+        assert len(handle_calls) == 1
+        args = handle_calls[0]
+        assert args[0] == self.mock_session
+        if expected_part is not None:
+            # Command parts should contain the modified command
+            assert expected_part in args[2]
 
 
 class TestBackwardCompatibilityStdin:
     """Test backward compatibility stdin handling."""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _session(self, session_mock):
         """Set up test fixtures."""
-        self.mock_session = Mock(spec=MCPSession)
+        self.mock_session = session_mock
         self.mock_session.output_formatter = None
 
-    @pytest.mark.asyncio
-    async def test_backward_compatibility_stdin_resource_read(self):
+    def test_backward_compatibility_stdin_resource_read(self, handle_calls):
         """Test backward compatibility for stdin resource read."""
         stdin_input = '{"uri": "file:///test.txt"}'
         commands = ("r", "read")
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+        _run(self.mock_session, commands, stdin_input)
 
-            mock_handle.assert_called_once()
+        assert len(handle_calls) == 1
 
-    @pytest.mark.asyncio
-    async def test_backward_compatibility_stdin_no_command(self):
+    def test_backward_compatibility_stdin_no_command(self, handle_calls):
         """Test backward compatibility for stdin with no command."""
         stdin_input = '{"uri": "file:///test.txt"}'
         commands = ()
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+        _run(self.mock_session, commands, stdin_input)
 
-            mock_handle.assert_called_once()
-            args = mock_handle.call_args[0]
-            assert args[0] == self.mock_session
-            # Should use default command when no command is provided
-            assert len(args[2]) > 0
+        assert len(handle_calls) == 1
+        args = handle_calls[0]
+        assert args[0] == self.mock_session
+        # Should use default command when no command is provided
+        assert len(args[2]) > 0
 
 
 class TestStdinErrorHandling:
     """Test error handling in stdin input."""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _session(self, session_mock):
         """Set up test fixtures."""
-        self.mock_session = Mock(spec=MCPSession)
+        self.mock_session = session_mock
         self.mock_session.output_formatter = Mock()
 
-    @pytest.mark.asyncio
-    async def test_empty_stdin_input(self):
+    def test_empty_stdin_input(self, handle_calls):
         """Test empty stdin input."""
         stdin_input = ""
         commands = ("r", "read")
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+        _run(self.mock_session, commands, stdin_input)
 
-            mock_handle.assert_called_once()
+        assert len(handle_calls) == 1
 
-    @pytest.mark.asyncio
-    async def test_whitespace_only_stdin(self):
+    def test_whitespace_only_stdin(self, handle_calls):
         """Test whitespace-only stdin input."""
         stdin_input = "   "
         commands = ("r", "read")
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+        _run(self.mock_session, commands, stdin_input)
 
-            mock_handle.assert_called_once()
+        assert len(handle_calls) == 1
 
-    @pytest.mark.asyncio
-    async def test_no_command_no_stdin(self):
+    def test_no_command_no_stdin(self, handle_calls):
         """Test no command and no stdin."""
         stdin_input = ""
         commands = ()
 
-        with patch("mcpie_cli.mcpie.handle_command") as mock_handle:
-            await run_commands(self.mock_session, commands, stdin_input)
+        _run(self.mock_session, commands, stdin_input)
 
-            mock_handle.assert_called_once()
+        assert len(handle_calls) == 1
 
 
 class TestStdinJSONParsing:
@@ -203,7 +147,7 @@ class TestStdinJSONParsing:
     def test_valid_json_parsing(self):
         """Test parsing valid JSON from stdin."""
         json_string = '{"key": "value", "number": 42}'
-        parsed = json.loads(json_string)
+        parsed = orjson.loads(json_string)
 
         assert parsed == {"key": "value", "number": 42}
 
@@ -211,23 +155,40 @@ class TestStdinJSONParsing:
         """Test handling invalid JSON from stdin."""
         invalid_json = '{"key": "value", "number": 42'
 
-        with pytest.raises(json.JSONDecodeError):
-            json.loads(invalid_json)
+        with pytest.raises(orjson.JSONDecodeError):
+            orjson.loads(invalid_json)
 
     def test_json_with_nested_objects(self):
         """Test parsing JSON with nested objects."""
         json_string = '{"user": {"name": "test", "age": 30}, "active": true}'
-        parsed = json.loads(json_string)
+        parsed = orjson.loads(json_string)
 
         assert parsed == {"user": {"name": "test", "age": 30}, "active": True}
 
     def test_json_array_parsing(self):
         """Test parsing JSON arrays."""
         json_string = '[{"name": "item1"}, {"name": "item2"}]'
-        parsed = json.loads(json_string)
+        parsed = orjson.loads(json_string)
 
         assert parsed == [{"name": "item1"}, {"name": "item2"}]
 
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ('{"a": 1}', True),
+            ("  \n[1, 2]", True),
+            ('{"invalid": json}', True),
+            ("config://app", False),
+            ("hello world", False),
+            ("42", False),
+            ("", False),
+            ("   ", False),
+        ],
+    )
+    def test_looks_like_json(self, text, expected):
+        """Test the prefilter that decides whether to try parsing stdin."""
+        assert looks_like_json(text) is expected
+
 
 class TestStdinCommandConstruction:
     """Test command string construction with stdin input."""
@@ -1,11 +1,18 @@
 """
 Test summary demonstrating that all major features are working.
+
+The shared fixtures used here (data_result, output_configs) are module or
+session scoped and never modified, so tests can run in any order or spread
+across pytest-xdist workers.
 """
 
 import json
-import tempfile
-import os
-from unittest.mock import Mock, patch
+import random
+import string
+from types import SimpleNamespace
+
+import orjson
+import pytest
 
 from mcpie_cli.mcpie import (
     OutputConfig,
@@ -23,215 +30,170 @@ from mcpie_cli.mcpie import (
 )
 
 
-class TestFeatureSummary:
-    """Test summary showing all major features work."""
-
-    def test_output_formatters_basic_functionality(self):
-        """Test that all output formatters work with basic data."""
-        config = OutputConfig("json", False, False, None)
-
-        # Test all formatters can be created
-        json_formatter = JsonOutputFormatter(config)
-        pretty_formatter = PrettyOutputFormatter(config)
-        table_formatter = TableOutputFormatter(config)
-        yaml_formatter = YamlOutputFormatter(config)
-        raw_formatter = RawOutputFormatter(config)
-
-        # Test basic formatting
-        mock_result = Mock()
-        mock_result.model_dump.return_value = {"test": "data"}
-
-        json_output = json_formatter.format_result(mock_result)
-        assert json_output == '{"test": "data"}'
-
-        pretty_output = pretty_formatter.format_result(mock_result)
-        assert "test" in pretty_output
-        assert "data" in pretty_output
-
-        table_output = table_formatter.format_result(mock_result)
-        assert "test: data" in table_output
-
-        yaml_output = yaml_formatter.format_result(mock_result)
-        assert "test: data" in yaml_output
-
-        raw_output = raw_formatter.format_result(mock_result)
-        assert "test" in raw_output
-
-    def test_output_config_creation(self):
-        """Test OutputConfig creation with different options."""
-        # Test default config
-        config1 = OutputConfig("json", False, False, None)
-        assert config1.output_format == "json"
-        assert config1.quiet is False
-        assert config1.verbose is False
-        assert config1.output_file is None
-
-        # Test config with all options
-        config2 = OutputConfig("yaml", True, True, "output.yaml")
-        assert config2.output_format == "yaml"
-        assert config2.quiet is True
-        assert config2.verbose is True
-        assert config2.output_file == "output.yaml"
-
-    def test_get_output_formatter_selection(self):
-        """Test that get_output_formatter returns correct formatter types."""
-        configs = [
-            ("json", JsonOutputFormatter),
-            ("pretty", PrettyOutputFormatter),
-            ("table", TableOutputFormatter),
-            ("yaml", YamlOutputFormatter),
-            ("raw", RawOutputFormatter),
-        ]
-
-        for format_name, expected_class in configs:
-            config = OutputConfig(format_name, False, False, None)
-            formatter = get_output_formatter(config)
-            assert isinstance(formatter, expected_class)
-
-        # Test unknown format defaults to JSON
-        config = OutputConfig("unknown", False, False, None)
-        formatter = get_output_formatter(config)
-        assert isinstance(formatter, JsonOutputFormatter)
-
-    def test_exit_code_constants(self):
-        """Test that exit code constants are defined correctly."""
-        assert EXIT_SUCCESS == 0
-        assert EXIT_CLI_ERROR == 1
-        assert EXIT_SERVER_ERROR == 2
-        assert EXIT_INVALID_INPUT == 3
-
-    def test_exit_with_code_functionality(self):
-        """Test exit_with_code function behavior."""
-        # Test with mock to avoid actual system exit
-        with patch("sys.exit") as mock_exit:
-            with patch("builtins.print") as mock_print:
-                # Test success message
-                exit_with_code(EXIT_SUCCESS, "Success", False)
-                mock_print.assert_called_with("Success")
-                mock_exit.assert_called_with(EXIT_SUCCESS)
-
-        # Test quiet mode
-        with patch("sys.exit") as mock_exit:
-            with patch("builtins.print") as mock_print:
-                exit_with_code(EXIT_CLI_ERROR, "Error", True)
-                mock_print.assert_not_called()
-                mock_exit.assert_called_with(EXIT_CLI_ERROR)
-
-    def test_file_output_functionality(self):
-        """Test file output functionality."""
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as tmp:
-            tmp_path = tmp.name
-
-        try:
-            config = OutputConfig("json", False, False, tmp_path)
-            formatter = JsonOutputFormatter(config)
-
-            # Test that formatter can write to file
-            test_data = {"test": "file_output"}
-            mock_result = Mock()
-            mock_result.model_dump.return_value = test_data
-
-            output = formatter.format_result(mock_result)
-            formatter.write(output)
-
-            # Verify file was written
-            with open(tmp_path, "r") as f:
-                content = f.read()
-
-            assert content == '{"test": "file_output"}'
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
-    def test_list_formatting(self):
-        """Test list formatting across different formatters."""
-        items = [
-            {"name": "item1", "description": "desc1"},
-            {"name": "item2", "description": "desc2"},
-        ]
-        columns = ["name", "description"]
-
-        # Test JSON formatter
-        json_config = OutputConfig("json", False, False, None)
-        json_formatter = JsonOutputFormatter(json_config)
-        json_output = json_formatter.format_list(items, "Test", columns)
-        parsed = json.loads(json_output)
-        assert len(parsed) == 2
-        assert parsed[0]["name"] == "item1"
-
-        # Test pretty formatter
-        pretty_config = OutputConfig("pretty", False, False, None)
-        pretty_formatter = PrettyOutputFormatter(pretty_config)
-        pretty_output = pretty_formatter.format_list(items, "Test", columns)
-        assert "item1" in pretty_output
-        assert "desc1" in pretty_output
-
-        # Test table formatter
-        table_config = OutputConfig("table", False, False, None)
-        table_formatter = TableOutputFormatter(table_config)
-        table_output = table_formatter.format_list(items, "Test", columns)
-        assert "name" in table_output
-        assert "description" in table_output
-        assert "item1" in table_output
-
-    def test_error_handling_in_formatters(self):
-        """Test error handling in formatters."""
-        config = OutputConfig("json", False, False, None)
-        formatter = JsonOutputFormatter(config)
-
-        # Test with None result
-        output = formatter.format_result(None)
-        assert output == "{}"
-
-        # Test with empty list
-        output = formatter.format_list([], "Test", ["name"])
-        assert output == "[]"
-
-    def test_quiet_mode_functionality(self):
-        """Test quiet mode functionality."""
-        # Test quiet mode suppresses error output
-        quiet_config = OutputConfig("json", True, False, None)
-        quiet_formatter = JsonOutputFormatter(quiet_config)
-
-        with patch("builtins.print") as mock_print:
-            quiet_formatter.format_error("Test error")
-            mock_print.assert_not_called()
-
-        # Test normal mode shows error output
-        normal_config = OutputConfig("json", False, False, None)
-        normal_formatter = JsonOutputFormatter(normal_config)
-
-        with patch("sys.stderr") as mock_stderr:
-            normal_formatter.format_error("Test error")
-            mock_stderr.write.assert_called()
-
-    def test_comprehensive_workflow(self):
-        """Test a comprehensive workflow combining multiple features."""
-        # Create config with multiple options
-        config = OutputConfig("json", False, True, None)
-        assert config.output_format == "json"
-        assert config.quiet is False
-        assert config.verbose is True
-
-        # Get formatter
-        formatter = get_output_formatter(config)
-        assert isinstance(formatter, JsonOutputFormatter)
-
-        # Format result
-        mock_result = Mock()
-        mock_result.model_dump.return_value = {"status": "success", "data": [1, 2, 3]}
-
-        output = formatter.format_result(mock_result)
-        parsed = json.loads(output)
-        assert parsed["status"] == "success"
-        assert parsed["data"] == [1, 2, 3]
-
-        # Format list
-        items = [{"id": 1, "name": "test1"}, {"id": 2, "name": "test2"}]
-        list_output = formatter.format_list(items, "Items", ["id", "name"])
-        parsed_list = json.loads(list_output)
-        assert len(parsed_list) == 2
-        assert parsed_list[0]["id"] == 1
+# Expected compact JSON (orjson adds no whitespace) for the payloads below
+DATA_JSON = '{"test":"data"}'
+FILE_OUTPUT_JSON = '{"test":"file_output"}'
+INTEGRATION_JSON = '{"test":"integration"}'
+
+
+@pytest.mark.parametrize(
+    "fmt, cls, expected",
+    [
+        ("json", JsonOutputFormatter, DATA_JSON),
+        ("pretty", PrettyOutputFormatter, '{\n  "test": "data"\n}'),
+        ("table", TableOutputFormatter, "test: data"),
+        ("yaml", YamlOutputFormatter, "test: data\n"),
+        # Raw output falls back to the dict itself without known content keys
+        ("raw", RawOutputFormatter, "{'test': 'data'}"),
+        # Unknown formats default to JSON
+        ("unknown", JsonOutputFormatter, DATA_JSON),
+    ],
+)
+def test_formatter(fmt, cls, expected, data_result):
+    """Test each format selects its formatter and formats basic data."""
+    config = OutputConfig(fmt, False, False, None)
+    formatter = get_output_formatter(config)
+    assert type(formatter) is cls
+
+    assert formatter.format_result(data_result) == expected
+
+
+def test_output_config_creation():
+    """Test OutputConfig creation with different options."""
+    # Test default config
+    config1 = OutputConfig("json", False, False, None)
+    assert config1.output_format == "json"
+    assert config1.quiet is False
+    assert config1.verbose is False
+    assert config1.output_file is None
+
+    # Test config with all options
+    config2 = OutputConfig("yaml", True, True, "output.yaml")
+    assert config2.output_format == "yaml"
+    assert config2.quiet is True
+    assert config2.verbose is True
+    assert config2.output_file == "output.yaml"
+
+
+def test_exit_code_constants():
+    """Test that exit code constants are defined correctly."""
+    assert EXIT_SUCCESS == 0
+    assert EXIT_CLI_ERROR == 1
+    assert EXIT_SERVER_ERROR == 2
+    assert EXIT_INVALID_INPUT == 3
+
+
+def test_exit_with_code_functionality(capsys, exit_calls):
+    """Test exit_with_code function behavior."""
+    # Test success message
+    exit_with_code(EXIT_SUCCESS, "Success", False)
+    assert capsys.readouterr().out == "Success\n"
+
+    # Test quiet mode
+    exit_with_code(EXIT_CLI_ERROR, "Error", True)
+    assert capsys.readouterr() == ("", "")
+
+    assert exit_calls == [EXIT_SUCCESS, EXIT_CLI_ERROR]
+
+
+def test_file_output_functionality(tmp_path):
+    """Test file output functionality."""
+    output_file = tmp_path / "out.json"
+    config = OutputConfig("json", False, False, str(output_file))
+    formatter = JsonOutputFormatter(config)
+
+    # Test that formatter can write to file
+    test_data = orjson.loads(FILE_OUTPUT_JSON)
+    data_result = SimpleNamespace(model_dump=lambda **kwargs: test_data)
+
+    output = formatter.format_result(data_result)
+    formatter.write(output)
+    formatter.write("\n")
+    # Output stays buffered until flush or close
+    assert output_file.read_text() == ""
+
+    formatter.flush()
+    assert output_file.read_text() == FILE_OUTPUT_JSON + "\n"
+
+    formatter.close()
+    assert output_file.read_text() == FILE_OUTPUT_JSON + "\n"
+
+
+def _make_items(n):
+    """Build n list items with descriptions of varying width, seeded."""
+    rng = random.Random(0)
+    return [
+        {
+            "name": f"item{i}",
+            "description": "".join(
+                rng.choices(string.ascii_lowercase, k=rng.randint(1, 20))
+            ),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+@pytest.mark.parametrize("n", [2, 100, 1000])
+def test_list_formatting(n, output_configs):
+    """Test list formatting across different formatters."""
+    items = _make_items(n)
+    columns = ["name", "description"]
+
+    # Test JSON formatter
+    json_formatter = JsonOutputFormatter(output_configs["json"])
+    json_output = json_formatter.format_list(items, "Test", columns)
+    parsed = orjson.loads(json_output)
+    assert len(parsed) == n
+    assert parsed[0]["name"] == "item1"
+
+    # Test pretty formatter
+    pretty_formatter = PrettyOutputFormatter(output_configs["pretty"])
+    pretty_output = pretty_formatter.format_list(items, "Test", columns)
+    assert pretty_output == json.dumps(items, indent=2)
+
+    # Test table formatter
+    table_formatter = TableOutputFormatter(output_configs["table"])
+    table_output = table_formatter.format_list(items, "Test", columns)
+    name_width = max(len("name"), *(len(item["name"]) for item in items))
+    desc_width = max(len("description"), *(len(item["description"]) for item in items))
+    header = f"{'name':<{name_width}} | {'description':<{desc_width}}"
+    assert table_output.split("\n") == [
+        header,
+        "-" * len(header),
+        *(
+            f"{item['name']:<{name_width}} | {item['description']:<{desc_width}}"
+            for item in items
+        ),
+    ]
+
+
+def test_error_handling_in_formatters(output_configs):
+    """Test error handling in formatters."""
+    formatter = JsonOutputFormatter(output_configs["json"])
+
+    # Test with None result
+    output = formatter.format_result(None)
+    assert output == "{}"
+
+    # Test with empty list
+    output = formatter.format_list([], "Test", ["name"])
+    assert output == "[]"
+
+
+def test_quiet_mode_functionality(capsys, output_configs):
+    """Test quiet mode functionality."""
+    # Test quiet mode suppresses error output
+    quiet_config = OutputConfig("json", True, False, None)
+    quiet_formatter = JsonOutputFormatter(quiet_config)
+
+    quiet_formatter.format_error("Test error")
+    assert capsys.readouterr() == ("", "")
+
+    # Test normal mode shows error output
+    normal_formatter = JsonOutputFormatter(output_configs["json"])
+
+    normal_formatter.format_error("Test error")
+    assert capsys.readouterr() == ("", "Error: Test error\n")
 
 
 def test_all_features_integration():
@@ -242,19 +204,19 @@ def test_all_features_integration():
 
     # Test formatter creation
     formatter = get_output_formatter(config)
-    assert isinstance(formatter, JsonOutputFormatter)
+    assert type(formatter) is JsonOutputFormatter
 
     # Test result formatting
-    mock_result = Mock()
-    mock_result.model_dump.return_value = {"test": "integration"}
+    test_data = orjson.loads(INTEGRATION_JSON)
+    data_result = SimpleNamespace(model_dump=lambda **kwargs: test_data)
 
-    output = formatter.format_result(mock_result)
-    assert output == '{"test": "integration"}'
+    output = formatter.format_result(data_result)
+    assert output == INTEGRATION_JSON
 
     # Test list formatting
     items = [{"name": "test", "value": 123}]
     list_output = formatter.format_list(items, "Test", ["name", "value"])
-    parsed = json.loads(list_output)
+    parsed = orjson.loads(list_output)
     assert len(parsed) == 1
     assert parsed[0]["name"] == "test"
 
@@ -263,10 +225,3 @@ def test_all_features_integration():
     assert EXIT_CLI_ERROR == 1
     assert EXIT_SERVER_ERROR == 2
     assert EXIT_INVALID_INPUT == 3
-
-    print("✅ All major features are working correctly!")
-
-
-if __name__ == "__main__":
-    test_all_features_integration()
-    print("✅ Feature integration test passed!")